@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import os
 import json
+import hashlib
 import math
 import uuid
 import datetime
@@ -17,6 +18,9 @@ from Crypto.Cipher import AES
 DEFAULT_CHUNK_SIZE = 128  # Size in MB
 CHUNK_SIZE = 1024 * 1024 * DEFAULT_CHUNK_SIZE
 CERTS_DIR = "certs"
+DD_BLOCK_SIZE = 16 * 1024 * 1024  # largest single write dd issues per chunk
+VERIFY_SAMPLE_BYTES = 4096  # bytes read back per chunk after the final pass
+PROGRESS_POLL_MS = 50  # the Tk main loop redraws wipe progress at most this often
 
 WIPE_METHODS = {
     "DoD 5220.22-M (3 passes)": {
@@ -36,7 +40,7 @@ WIPE_METHODS = {
     "Cryptographic Erasure (AES-256)": {
         "description": "Quickly erases data by overwriting with encrypted zeros. Perfect for modern drives.",
         "pros": [
-            "Much faster - only two passes needed",
+            "Much faster - only one pass needed",
             "Safe for all drive types including SSDs",
             "Very secure using modern encryption"
         ],
@@ -66,6 +70,17 @@ WIPE_METHODS = {
     }
 }
 
+def read_sysfs(path):
+    """Return a sysfs attribute as a stripped string, or None if it does not exist."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        return os.read(fd, 64).decode().strip()
+    finally:
+        os.close(fd)
+
 class NullNovaGUI:
     def __init__(self, root):
         self.root = root
@@ -78,9 +93,16 @@ class NullNovaGUI:
         self.selected_method = tk.StringVar()
         self.devices = []
         self.chunk_size_mb = tk.IntVar(value=DEFAULT_CHUNK_SIZE)
+        # Latest (progress, status) posted by the wipe thread, and what is on screen
+        self._progress_state = (0, "")
+        self._drawn_state = None
+        # Crypto pass scratch buffers, reused across chunks
+        self._crypto_zeros = memoryview(b"")
+        self._crypto_out = memoryview(bytearray())
         
         self.setup_gui()
         self.refresh_devices()
+        self.pump_progress()
 
     def setup_gui(self):
         """Setup GUI elements."""
@@ -196,26 +218,23 @@ class NullNovaGUI:
                 continue
                 
             dev_name = os.path.basename(device.get('DEVNAME'))
-            removable_path = f"/sys/block/{dev_name}/removable"
             
             try:
-                if os.path.exists(removable_path):
-                    with open(removable_path, 'r') as f:
-                        removable = f.read().strip() == '1'
-                else:
-                    removable = False
+                removable = read_sysfs(f"/sys/block/{dev_name}/removable") == '1'
                     
                 if removable or dev_name.startswith(('sd', 'loop')):
-                    size_path = f"/sys/block/{dev_name}/size"
-                    with open(size_path, 'r') as f:
-                        size = int(f.read().strip()) * 512
+                    size = int(read_sysfs(f"/sys/block/{dev_name}/size")) * 512
+
+                    # Unknown media is treated as rotational (full DoD wipe)
+                    rotational = read_sysfs(f"/sys/block/{dev_name}/queue/rotational") != '0'
                         
                     devices.append({
                         "name": device.get('DEVNAME'),
                         "size": size,
-                        "size_gb": round(size / (1024**3), 2)
+                        "size_gb": round(size / (1024**3), 2),
+                        "rotational": rotational
                     })
-            except (IOError, ValueError):
+            except (OSError, TypeError, ValueError):
                 continue
                 
         return devices
@@ -233,10 +252,21 @@ class NullNovaGUI:
             self.device_combo.set('')
 
     def update_progress(self, progress, status):
-        """Update progress bar and status label."""
-        self.progress_var.set(progress)
-        self.status_label['text'] = status
-        self.root.update_idletasks()
+        """Post progress for the progress bar and status label.
+
+        Only records the values, so it is cheap and safe to call from the wipe
+        thread; pump_progress draws the latest values on the Tk main loop.
+        """
+        self._progress_state = (progress, status)
+
+    def pump_progress(self):
+        """Draw the latest posted progress if it changed, then reschedule."""
+        state = self._progress_state
+        if state != self._drawn_state:
+            self.progress_var.set(state[0])
+            self.status_label['text'] = state[1]
+            self._drawn_state = state
+        self.root.after(PROGRESS_POLL_MS, self.pump_progress)
 
     def write_chunk(self, device_path, source, offset, size):
         """Write a chunk of data from source to device at offset."""
@@ -267,23 +297,22 @@ class NullNovaGUI:
             pattern_name = "zeros" if pattern == 0x00 else "ones" if pattern == 0xFF else "random"
             print(f"[DEBUG] Writing {pattern_name} pattern at offset {offset}")
 
-            # Calculate optimal block size for edge cases
-            block_size = min(size, 1024 * 1024)  # Use 1MB blocks minimum
-            blocks_needed = (size + block_size - 1) // block_size
+            # Large blocks keep the device queue busy; count and seek are in
+            # bytes so the chunk offset need not be a multiple of the block size
+            block_size = min(size, DD_BLOCK_SIZE)
+            dd_args = (f'of={device_path} bs={block_size} count={size} seek={offset} '
+                       f'iflag=count_bytes,fullblock oflag=seek_bytes,direct '
+                       f'conv=notrunc status=progress 2>&1\n')
 
             if pattern == 0x00:  # All zeros
-                cmd = (f'dd if=/dev/zero of={device_path} bs={block_size} count={blocks_needed} '
-                      f'seek={offset//block_size} conv=notrunc,sync status=progress oflag=direct 2>&1\n')
+                cmd = f'dd if=/dev/zero {dd_args}'
             elif pattern == 0xFF:  # All ones
-                cmd = (
-                    f'dd if=/dev/zero bs={block_size} count={blocks_needed} | tr "\\000" "\\377" > /dev/shm/ones && '
-                    f'dd if=/dev/shm/ones of={device_path} bs={block_size} count={blocks_needed} '
-                    f'seek={offset//block_size} conv=notrunc,sync status=progress oflag=direct 2>&1 && '
-                    f'rm -f /dev/shm/ones\n'
-                )
+                if not self.prepare_ones(size):
+                    print("[ERROR] Could not generate the ones pattern in /dev/shm")
+                    return False
+                cmd = f'dd if=/dev/shm/ones {dd_args}'
             else:  # Random data
-                cmd = (f'dd if=/dev/urandom of={device_path} bs={block_size} count={blocks_needed} '
-                      f'seek={offset//block_size} conv=notrunc,sync status=progress oflag=direct 2>&1\n')
+                cmd = f'dd if=/dev/urandom {dd_args}'
 
             self.elevated_process.stdin.write(cmd)
             self.elevated_process.stdin.flush()
@@ -295,10 +324,12 @@ class NullNovaGUI:
             expected_bytes = size
             
             while (time.time() - start_time) < 60:  # 60 second timeout
+                # readline() blocks until dd prints; an empty string means the
+                # elevated shell closed its stdout, so there is nothing to wait for
                 output = self.elevated_process.stdout.readline()
                 if not output:
-                    time.sleep(0.1)
-                    continue
+                    print("[ERROR] Elevated process closed its output")
+                    break
                     
                 output = output.strip()
                 print(f"[DEBUG] Output: {output}")
@@ -321,52 +352,162 @@ class NullNovaGUI:
                 print(f"[ERROR] Write operation failed. Bytes written: {bytes_written}/{expected_bytes}")
                 return False
 
-            # Force sync
-            self.elevated_process.stdin.write("sync\n")
-            self.elevated_process.stdin.flush()
-            time.sleep(0.1)  # Reduced wait time
-            
+            # dd writes with oflag=direct; wipe_device syncs once at the end
             return True
 
         except Exception as e:
             print(f"[ERROR] Write pattern failed: {e}")
             return False
 
-    def verify_chunk(self, device_path, offset, size):
-        """Verify a chunk of data."""
-        cmd = f'dd if={device_path} bs={size} count=1 skip={offset//size} 2>/dev/null | hexdump -C | head -n 1\n'
+    def prepare_ones(self, size):
+        """Make /dev/shm/ones hold size bytes of 0xFF via the elevated shell.
+
+        The file is generated once and reused for every chunk of the same
+        length; wipe_device removes it when the wipe ends.
+        """
+        if self._ones_len == size:
+            return True
+        self._ones_len = 0  # whatever is in the file now is not trusted
+        cmd = (f'dd if=/dev/zero bs={min(size, DD_BLOCK_SIZE)} count={size} iflag=count_bytes 2>/dev/null '
+               f'| tr "\\000" "\\377" > /dev/shm/ones 2>/dev/null; '
+               f'echo "ones:$((PIPESTATUS[0] | PIPESTATUS[1]))"\n')
+        print(f"[DEBUG] Executing: {cmd.strip()}")
+
+        self.elevated_process.stdin.write(cmd)
+        self.elevated_process.stdin.flush()
+
+        # Skip any leftover dd output until our status marker arrives
+        while True:
+            output = self.elevated_process.stdout.readline()
+            if not output:
+                return False
+            output = output.strip()
+            if output.startswith("ones:"):
+                if output != "ones:0":
+                    return False
+                self._ones_len = size
+                return True
+
+    def sync_device(self):
+        """Flush written data via the elevated shell and wait for it to finish."""
+        cmd = 'sync; echo "sync:$?"\n'
+        print(f"[DEBUG] Executing: {cmd.strip()}")
+
+        self.elevated_process.stdin.write(cmd)
+        self.elevated_process.stdin.flush()
+
+        # Skip any leftover dd output until our status marker arrives
+        while True:
+            output = self.elevated_process.stdout.readline()
+            if not output:
+                return False
+            output = output.strip()
+            if output.startswith("sync:"):
+                print(f"[DEBUG] Sync result: {output}")
+                return output == "sync:0"
+
+    def discard_device(self, device_path):
+        """Issue a discard (TRIM) over the whole device via the elevated shell."""
+        cmd = f'blkdiscard {device_path} >/dev/null 2>&1; echo "discard:$?"\n'
+        print(f"[DEBUG] Executing: {cmd.strip()}")
+
         self.elevated_process.stdin.write(cmd)
         self.elevated_process.stdin.flush()
-        
-        output = self.elevated_process.stdout.readline()
-        print(f"[DEBUG] Verification sample at offset {offset}: {output.strip()}")
-        return True  # Basic verification - could be enhanced
 
-    def generate_certificate(self, device_info, passes, completed=True):
+        # Skip any leftover dd output until our status marker arrives
+        while True:
+            output = self.elevated_process.stdout.readline()
+            if not output:
+                return False
+            output = output.strip()
+            if output.startswith("discard:"):
+                print(f"[DEBUG] Discard result: {output}")
+                return output == "discard:0"
+
+    def verify_chunk(self, device_path, offset, size, samples=16):
+        """Read back samples spread across a chunk and check the final random pass landed."""
+        sample = min(size, VERIFY_SAMPLE_BYTES)
+        # Evenly spaced, sample-aligned positions (O_DIRECT needs the alignment)
+        span = size // samples
+        positions = sorted({offset + min(i * span, size - sample) // VERIFY_SAMPLE_BYTES * VERIFY_SAMPLE_BYTES
+                            for i in range(samples)})
+        reads = "; ".join(f'dd if={device_path} bs={sample} count=1 skip={pos} iflag=skip_bytes,direct'
+                          for pos in positions)
+        cmd = f'echo "verify:$({{ {reads}; }} 2>/dev/null | od -An -v -tx1 | tr -d \' \\n\')"\n'
+        self.elevated_process.stdin.write(cmd)
+        self.elevated_process.stdin.flush()
+
+        # Skip any leftover dd output until our sample arrives
+        while True:
+            output = self.elevated_process.stdout.readline()
+            if not output:
+                return False
+            output = output.strip()
+            if output.startswith("verify:"):
+                break
+
+        try:
+            data = bytes.fromhex(output[len("verify:"):])
+        except ValueError:
+            print(f"[ERROR] Unreadable verification sample at offset {offset}")
+            return False
+        print(f"[DEBUG] Verification samples at offset {offset}: {len(positions)} x {sample} bytes")
+        # The last pass is random, so a short read or a sample that is one
+        # repeated byte (e.g. still zeros or ones) means the write did not land
+        if len(data) != len(positions) * sample:
+            return False
+        for i, pos in enumerate(positions):
+            chunk = data[i * sample:(i + 1) * sample]
+            if chunk.count(chunk[:1]) == sample:
+                print(f"[ERROR] Uniform data at offset {pos}: {chunk[:16].hex()}")
+                return False
+        return True
+
+    def generate_certificate(self, device_info, passes, completed=True, wipe_id=None, started_at=None):
         """Generate JSON certificate for completed wipe."""
         try:
-            wipe_id = str(uuid.uuid4())
+            wipe_id = wipe_id or str(uuid.uuid4())
             
             # Get method and drive info
             method = self.selected_method.get()
             is_crypto = method.startswith("Crypto")
+            rotational = device_info.get("rotational", True)
+            discarded = device_info.get("discarded", False)
+
+            if is_crypto:
+                method_name = "AES-256 Cryptographic Erasure"
+            elif rotational:
+                method_name = "DoD 5220.22-M Secure Erase"
+            elif discarded:
+                method_name = "Single-pass Random Overwrite + Discard (non-rotational media)"
+            else:
+                method_name = "Single-pass Random Overwrite (non-rotational media)"
             
             cert = {
                 "WipeDevice": wipe_id,
                 "Device": device_info["name"],
-                "Method": "AES-256 Cryptographic Erasure" if is_crypto else "DoD 5220.22-M Secure Erase",
-                "Passes": 2 if is_crypto else 3,
+                "Method": method_name,
+                "Passes": passes,
+                "Rotational": rotational,
+                "Discarded": discarded,
+                "Started": started_at,
                 "Timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                "Hash": uuid.uuid5(uuid.NAMESPACE_DNS, wipe_id).hex,
             }
+            # Integrity hash over all certificate fields, in the same canonical
+            # form as nullnova_linux.py (sorted keys, compact, UTF-8)
+            canonical = json.dumps(cert, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+            cert["Hash"] = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
             
             # Create certs directory if needed
             os.makedirs(CERTS_DIR, exist_ok=True)
             
-            # Write certificate
+            # Write certificate; renaming a finished temp file means a reader
+            # never sees a half-written one
             cert_path = os.path.join(CERTS_DIR, f"wipe_{wipe_id[:8]}.json")
-            with open(cert_path, 'w') as f:
+            tmp_path = cert_path + ".tmp"
+            with open(tmp_path, 'w') as f:
                 json.dump(cert, f, indent=2)
+            os.replace(tmp_path, cert_path)
             
             return cert_path
             
@@ -380,6 +521,7 @@ class NullNovaGUI:
         chunk_size = 1024 * 1024 * self.chunk_size_mb.get()
         device_path = device_info["name"]
         device_size = device_info["size"]
+        device_info["discarded"] = False  # set once a discard has actually succeeded
         
         print(f"[DEBUG] Starting DoD 5220.22-M wipe process for {device_path}")
         print(f"[DEBUG] Using chunk size: {self.chunk_size_mb.get()} MB")
@@ -418,7 +560,15 @@ class NullNovaGUI:
             0xFF,    # Pass 2: All ones
             None     # Pass 3: Random data
         ]
+
+        # On flash media wear-leveling makes the zero/ones passes pointless;
+        # a single random pass followed by a discard is equivalent and 3x faster
+        rotational = device_info.get("rotational", True)
+        if not rotational:
+            print("[DEBUG] Non-rotational device, using single random pass + discard")
+            patterns = [None]
         
+        self._ones_len = 0  # nothing in /dev/shm/ones for this elevated shell yet
         chunks = math.ceil(device_size / chunk_size)
         print(f"[DEBUG] Total chunks: {chunks}, Chunk size: {chunk_size/(1024*1024)}MB")
         self.update_progress(0, "Starting wipe process...")
@@ -442,7 +592,7 @@ class NullNovaGUI:
             
             if is_crypto:
                 print("[DEBUG] Using cryptographic erasure method")
-                total_operations = chunks * 2  # Zero pass + crypto pass
+                total_operations = chunks  # Single crypto pass
             else:
                 print("[DEBUG] Using DoD 5220.22-M method")
                 total_operations = chunks * (len(patterns) + 1)  # +1 for verification
@@ -464,7 +614,7 @@ class NullNovaGUI:
                     # Existing DoD wipe code
                     for pass_idx, pattern in enumerate(patterns, 1):
                         pattern_name = "zeros" if pattern == 0x00 else "ones" if pattern == 0xFF else "random"
-                        status = f"Pass {pass_idx}/3 ({pattern_name}) - Chunk {chunk_idx + 1}/{chunks}"
+                        status = f"Pass {pass_idx}/{len(patterns)} ({pattern_name}) - Chunk {chunk_idx + 1}/{chunks}"
                         self.update_progress(progress=(operations_done / total_operations) * 100, status=status)
                         
                         if not self.write_pattern(device_path, pattern, chunk_offset, chunk_size_actual):
@@ -473,10 +623,6 @@ class NullNovaGUI:
                             return False
                         
                         operations_done += 1
-                        
-                        # Sync after each pass
-                        self.elevated_process.stdin.write("sync\n")
-                        self.elevated_process.stdin.flush()
                     
                     # Verify chunk
                     status = f"Verifying - Chunk {chunk_idx + 1}/{chunks}"
@@ -489,6 +635,21 @@ class NullNovaGUI:
                         
                     operations_done += 1
                     print(f"[DEBUG] Completed and verified chunk {chunk_idx + 1}/{chunks}")
+
+            # Single flush of the device once every pass is written; the wipe
+            # is not certified until it has finished
+            self.update_progress(100, "Flushing device...")
+            if not self.sync_device():
+                print("[ERROR] Final sync failed")
+                messagebox.showerror("Error", "Failed to flush the device")
+                return False
+
+            # Flash pages still holding stale copies are released either way
+            if not rotational:
+                self.update_progress(100, "Discarding device blocks...")
+                device_info["discarded"] = self.discard_device(device_path)
+                if not device_info["discarded"]:
+                    print("[DEBUG] Discard not supported by device, overwrite only")
                     
             self.update_progress(100, "Wipe completed and verified")
             print("[DEBUG] DoD 5220.22-M wipe process completed successfully")
@@ -501,6 +662,7 @@ class NullNovaGUI:
         finally:
             try:
                 print("[DEBUG] Cleaning up elevated process")
+                self.elevated_process.stdin.write("rm -f /dev/shm/ones\n")
                 self.elevated_process.stdin.write("exit\n")
                 self.elevated_process.stdin.flush()
                 self.elevated_process.stdin.close()
@@ -550,11 +712,20 @@ class NullNovaGUI:
 
     def wipe_thread(self, device_info):
         """Thread for wiping process."""
+        # Certificate identity is fixed when the wipe starts
+        wipe_id = str(uuid.uuid4())
+        started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
         try:
             success = self.wipe_device(device_info)
             if success:
                 try:
-                    cert_path = self.generate_certificate(device_info, passes=3)
+                    is_crypto = self.selected_method.get().startswith("Crypto")
+                    if is_crypto:
+                        passes = 1
+                    else:
+                        passes = 3 if device_info.get("rotational", True) else 1
+                    cert_path = self.generate_certificate(device_info, passes=passes,
+                                                          wipe_id=wipe_id, started_at=started_at)
                     messagebox.showinfo(
                         "Success",
                         f"Wipe completed successfully!\nCertificate saved to: {cert_path}"
@@ -604,18 +775,20 @@ class NullNovaGUI:
             key = secrets.token_bytes(32)
             cipher = AES.new(key, AES.MODE_CTR)
             
-            # First pass: zeros
-            if not self.write_pattern(device_path, 0x00, offset, size):
-                return False
-                
-            # Second pass: encrypted zeros
-            encrypted_data = cipher.encrypt(b'\0' * size)
+            # Single pass of encrypted zeros. The CTR keystream is written straight
+            # into a reused output buffer; the zero input is allocated only once
+            if len(self._crypto_zeros) < size:
+                self._crypto_zeros = memoryview(bytes(size))
+                self._crypto_out = memoryview(bytearray(size))
+            encrypted_data = self._crypto_out[:size]
+            cipher.encrypt(self._crypto_zeros[:size], output=encrypted_data)
             with open("/dev/shm/crypto_data", "wb") as f:
                 f.write(encrypted_data)
             
             cmd = (
-                f'dd if=/dev/shm/crypto_data of={device_path} bs={size} count=1 '
-                f'seek={offset//size} conv=notrunc,sync status=progress oflag=direct 2>&1 && '
+                f'dd if=/dev/shm/crypto_data of={device_path} bs={min(size, DD_BLOCK_SIZE)} '
+                f'count={size} seek={offset} iflag=count_bytes,fullblock oflag=seek_bytes,direct '
+                f'conv=notrunc status=progress 2>&1 && '
                 f'rm -f /dev/shm/crypto_data\n'
             )
             
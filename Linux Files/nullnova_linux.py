@@ -5,16 +5,39 @@
 ##########################
 
 import os
+import sys
+import time
 import stat
 import json
+import hashlib
 import datetime
 import uuid
-import subprocess
 import pyudev
 import math
+import fcntl
+import struct
+import mmap
+import ctypes
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from Crypto.Cipher import AES
+except ImportError:
+    AES = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 CERTS_DIR = "certs"
 CHUNK_SIZE = 1024 * 1024 * 128  # 128MB chunks
+WIPE_STRIPES = 4  # concurrent writers on non-rotational devices
+PROGRESS_INTERVAL = 0.25  # seconds between progress line redraws
+BLKDISCARD = 0x1277  # _IO(0x12, 119)
+BLKZEROOUT = 0x127F  # _IO(0x12, 127)
 
 def is_block_device(path):
     """Check if the path is a block device."""
@@ -23,6 +46,73 @@ def is_block_device(path):
     except Exception:
         return False
 
+def is_rotational(device_path):
+    """Check whether the device is rotational media (HDD) via sysfs.
+
+    Unknown devices are treated as rotational so they keep the full multi-pass wipe.
+    """
+    dev_name = os.path.basename(os.path.realpath(device_path))
+    try:
+        with open(f"/sys/block/{dev_name}/queue/rotational", 'r') as f:
+            return f.read().strip() != "0"
+    except Exception:
+        return True
+
+def get_optimal_io_size(device_path):
+    """Get the preferred I/O unit of the device (optimal I/O size, else physical block size)."""
+    dev_name = os.path.basename(os.path.realpath(device_path))
+    for attr in ("optimal_io_size", "physical_block_size"):
+        try:
+            with open(f"/sys/block/{dev_name}/queue/{attr}", 'r') as f:
+                value = int(f.read().strip())
+            if value > 0:
+                return value
+        except Exception:
+            continue
+    return 512
+
+def discard_device(device_path, device_size):
+    """Issue BLKDISCARD (TRIM) over the whole device so flash can erase stale copies."""
+    try:
+        fd = os.open(device_path, os.O_WRONLY)
+        try:
+            fcntl.ioctl(fd, BLKDISCARD, struct.pack('QQ', 0, device_size))
+        finally:
+            os.close(fd)
+        return True
+    except Exception as e:
+        print(f"[!] Discard not supported on {device_path}: {e}")
+        return False
+
+def zero_range(fd, offset, length):
+    """Have the device zero a range itself (BLKZEROOUT) instead of sending zero buffers.
+
+    The kernel uses Write Zeroes where the device supports it and never
+    falls back to a discard, so the range really reads back as zeros.
+    """
+    try:
+        fcntl.ioctl(fd, BLKZEROOUT, struct.pack('QQ', offset, length))
+        return True
+    except OSError as e:
+        print(f"[!] BLKZEROOUT not supported, writing zeros instead: {e}")
+        return False
+
+def unmount_device(device_path):
+    """Unmount every mount of device_path with umount2(2) instead of spawning umount(8)."""
+    real = os.path.realpath(device_path)
+    try:
+        with open("/proc/self/mounts", 'r') as f:
+            mounts = [line.split()[1] for line in f
+                      if line.startswith("/") and os.path.realpath(line.split()[0]) == real]
+    except Exception:
+        return
+    libc = ctypes.CDLL(None, use_errno=True)
+    # Unmount the most recent mount first; mount points escape spaces as \040
+    for mountpoint in reversed(mounts):
+        target = mountpoint.replace("\\040", " ").encode()
+        if libc.umount2(target, 0) != 0:
+            print(f"[!] Could not unmount {mountpoint}: {os.strerror(ctypes.get_errno())}")
+
 def get_device_size(device_path):
     """Get device size in bytes."""
     try:
@@ -49,14 +139,20 @@ def list_removable_devices():
             devices.append({
                 "name": devnode,
                 "size": size,
-                "size_gb": round(size_gb, 2)
+                "size_gb": round(size_gb, 2),
+                "rotational": is_rotational(devnode)
             })
 
     return devices
 
-def choose_device():
-    """Prompt user to select a block device."""
-    devices = list_removable_devices()
+def choose_device(devices=None):
+    """Prompt user to select a block device.
+
+    devices is the list from an earlier list_removable_devices() call; the
+    devices are scanned again only if it is not given.
+    """
+    if devices is None:
+        devices = list_removable_devices()
     if not devices:
         print("[!] No devices found.")
         return None
@@ -77,72 +173,338 @@ def choose_device():
     print("[!] Invalid choice.")
     return None
 
-def write_chunk(device_path, source, offset, size):
-    """Write a chunk of data from source to device at offset."""
+def preallocate_file(path, size):
+    """Reserve the full extent of a file-backed target (disk image) up front."""
+    try:
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            os.posix_fallocate(fd, 0, size)
+        finally:
+            os.close(fd)
+        return True
+    except Exception as e:
+        print(f"[!] Preallocation failed for {path}: {e}")
+        return False
+
+class RandomSource:
+    """File-like random data source: AES-256-CTR keystream seeded once from
+    os.urandom, so each chunk costs one AES-NI pass instead of a kernel CSPRNG read."""
+
+    def __init__(self, chunk_size):
+        self._zeros = memoryview(bytes(chunk_size))
+        self._cipher = AES.new(os.urandom(32), AES.MODE_CTR, nonce=os.urandom(8))
+
+    def readinto(self, b):
+        # CTR keystream XOR zeros == keystream, written directly into b
+        self._cipher.encrypt(self._zeros[:len(b)], output=b)
+        return len(b)
+
+    def close(self):
+        pass
+
+def open_source(path, chunk_size):
+    """Open a pattern source; /dev/urandom is replaced by RandomSource when pycryptodome is available."""
+    if path == "/dev/urandom" and AES is not None:
+        return RandomSource(chunk_size)
+    return open(path, 'rb')
+
+def open_target(device_path):
+    """Open the wipe target for writing, bypassing the page cache where possible.
+
+    Block devices are opened with O_DIRECT | O_DSYNC, so each write is on stable
+    media when it returns. Returns (fd, direct); when direct is False the caller
+    should fsync and drop written pages with posix_fadvise instead.
+    """
+    if is_block_device(device_path):
+        try:
+            return os.open(device_path, os.O_WRONLY | os.O_DIRECT | os.O_DSYNC), True
+        except OSError as e:
+            print(f"[!] O_DIRECT not available on {device_path}: {e}")
+    return os.open(device_path, os.O_WRONLY), False
+
+def fill_from(source, buf):
+    """Fill buf completely from an open source file."""
+    if source.readinto(buf) != len(buf):
+        raise OSError("short read from pattern source")
+
+class PrefetchedSource:
+    """Fills page-aligned buffers from a random source on a background thread,
+    so generating the next chunk overlaps with writing the current one.
+    get() returns a slot index into buffers; release() hands it back. If the
+    source fails, every get() from then on raises that error."""
+
+    def __init__(self, source, chunk_size, count, slots=2):
+        self._maps = [mmap.mmap(-1, chunk_size) for _ in range(slots)]
+        self.buffers = [memoryview(m) for m in self._maps]
+        self._free = queue.Queue()
+        for i in range(slots):
+            self._free.put(i)
+        self._ready = queue.Queue()
+        self._thread = threading.Thread(target=self._produce, args=(source, count), daemon=True)
+        self._thread.start()
+
+    def _produce(self, source, count):
+        for _ in range(count):
+            i = self._free.get()
+            if i is None:
+                return
+            try:
+                fill_from(source, self.buffers[i])
+            except Exception as e:
+                self._ready.put(e)
+                return
+            self._ready.put(i)
+
+    def get(self):
+        item = self._ready.get()
+        if isinstance(item, Exception):
+            # Pass the error on so a stripe waiting behind this one fails too
+            self._ready.put(item)
+            raise item
+        return item
+
+    def release(self, i):
+        self._free.put(i)
+
+    def close(self):
+        self._free.put(None)
+        self._thread.join()
+        for b in self.buffers:
+            b.release()
+        for m in self._maps:
+            m.close()
+
+def write_chunk(fd, data, offset):
+    """Write a buffer to the device fd at offset."""
     try:
-        with open(source, 'rb') as src, open(device_path, 'rb+') as dst:
-            dst.seek(offset)
-            data = src.read(size)
-            dst.write(data)
+        while data:
+            n = os.pwrite(fd, data, offset)
+            data = data[n:]
+            offset += n
         return True
     except Exception as e:
         print(f"[!] Write error at offset {offset}: {e}")
         return False
 
+def wipe_chunks(ctx, chunk_indices):
+    """Apply every pass to each chunk in chunk_indices (one stripe of the device).
+
+    ctx holds the state shared by all stripes; pwrite on the shared fd is
+    positional, so stripes need no handle of their own.
+    """
+    fd = ctx["fd"]
+    chunk_len = ctx["chunk_len"]
+    chunks = ctx["chunks"]
+    device_size = ctx["device_size"]
+    prefetch = ctx["prefetch"]
+    offload_zero = ctx["offload_zero"]
+    lock = ctx["lock"]
+
+    for chunk_idx in chunk_indices:
+        if ctx["failed"].is_set():
+            return False
+        chunk_offset = chunk_idx * chunk_len
+        chunk_size = min(chunk_len, device_size - chunk_offset)
+        
+        # Apply all passes to current chunk before moving to next
+        offloaded = False
+        for pass_idx, src in enumerate(ctx["passes"], 1):
+            if src == "/dev/urandom":
+                slot = prefetch.get()
+                with prefetch.buffers[slot][:chunk_size] as data:
+                    ok = write_chunk(fd, data, chunk_offset)
+                prefetch.release(slot)
+            elif src == "/dev/zero" and offload_zero and zero_range(fd, chunk_offset, chunk_size):
+                ok = offloaded = True
+            else:
+                if src == "/dev/zero":
+                    offload_zero = False
+                with memoryview(ctx["constant_maps"][src])[:chunk_size] as data:
+                    ok = write_chunk(fd, data, chunk_offset)
+            if not ok:
+                with lock:
+                    print(f"\n[!] Failed during pass {pass_idx} at chunk {chunk_idx + 1}")
+                ctx["failed"].set()
+                return False
+            
+        # Sync after each chunk to ensure writes are committed. O_DSYNC already
+        # covers pwrite on the direct path; BLKZEROOUT bypasses it, so flush then
+        if not ctx["direct"] or offloaded:
+            os.fsync(fd)
+        if not ctx["direct"]:
+            # Written data is never read back; don't let it crowd the page cache
+            os.posix_fadvise(fd, chunk_offset, chunk_size, os.POSIX_FADV_DONTNEED)
+
+        # Redraw one progress line, at most every PROGRESS_INTERVAL
+        with lock:
+            ctx["done"] += 1
+            now = time.monotonic()
+            if now - ctx["last_print"] >= PROGRESS_INTERVAL or ctx["done"] == chunks:
+                sys.stdout.write(f"\r[*] Progress: {ctx['done']}/{chunks} chunks "
+                                 f"({ctx['done'] * 100 / chunks:.1f}%)")
+                sys.stdout.flush()
+                ctx["last_print"] = now
+    return True
+
+def run_stripe(ctx, chunk_indices):
+    """Run wipe_chunks for one stripe; if it raises, stop the other stripes too."""
+    try:
+        return wipe_chunks(ctx, chunk_indices)
+    except BaseException:
+        ctx["failed"].set()
+        raise
+
 def wipe_device_progressive(device_info, passes=3):
     """Securely wipe a block device with progressive passes."""
     device_path = device_info["name"]
     device_size = device_info["size"]
     
     # Unmount device if mounted
-    subprocess.run(["umount", device_path], stderr=subprocess.DEVNULL)
+    unmount_device(device_path)
+
+    # Image files: allocate all extents once so the passes are pure data writes.
+    # Block devices are already fully backed.
+    if not is_block_device(device_path) and os.path.isfile(device_path):
+        preallocate_file(device_path, device_size)
 
     sources = ["/dev/urandom", "/dev/zero", "/dev/urandom"]
-    chunks = math.ceil(device_size / CHUNK_SIZE)
+
+    # Round the chunk up to the device's preferred I/O unit so every write
+    # covers whole stripes/erase units
+    io_size = get_optimal_io_size(device_path)
+    chunk_len = ((CHUNK_SIZE + io_size - 1) // io_size) * io_size
+    chunks = math.ceil(device_size / chunk_len)
     
     print(f"[*] Starting progressive {passes}-pass wipe on {device_path}")
     print(f"[*] Device size: {device_info['size_gb']:.2f} GB")
-    print(f"[*] Using {CHUNK_SIZE / (1024*1024):.0f}MB chunks")
+    print(f"[*] Using {chunk_len / (1024*1024):.2f}MB chunks (device I/O unit: {io_size} bytes)")
 
-    for chunk_idx in range(chunks):
-        chunk_offset = chunk_idx * CHUNK_SIZE
-        chunk_size = min(CHUNK_SIZE, device_size - chunk_offset)
-        
-        print(f"\nProcessing chunk {chunk_idx + 1}/{chunks} "
-              f"({(chunk_offset/device_size*100):.1f}%)")
-        
-        # Apply all passes to current chunk before moving to next
-        for pass_idx, src in enumerate(sources[:passes], 1):
-            print(f"Pass {pass_idx}/{passes} using {src}...")
-            if not write_chunk(device_path, src, chunk_offset, chunk_size):
-                print(f"[!] Failed during pass {pass_idx} at chunk {chunk_idx + 1}")
-                return False
-            
-        # Sync after each chunk to ensure writes are committed
-        os.sync()
+    # Open the device once for the whole wipe. Constant patterns are read
+    # into a buffer once; random passes are generated ahead by a producer
+    # thread. Anonymous mmap memory is page-aligned, as O_DIRECT requires
+    fd, direct = open_target(device_path)
+    pass_sources = sources[:passes]
+    constant_maps = {}
+    random_source = open_source("/dev/urandom", chunk_len)
+    prefetch = None
+    # Flash media: split the device into contiguous stripes wiped concurrently
+    # so several writes are queued at once; spinning disks stay sequential
+    stripes = 1 if device_info.get("rotational", True) else max(1, min(WIPE_STRIPES, chunks))
+    try:
+        for src in set(pass_sources) - {"/dev/urandom"}:
+            constant_maps[src] = mmap.mmap(-1, chunk_len)
+            with open(src, 'rb') as f:
+                fill_from(f, memoryview(constant_maps[src]))
+        random_passes = pass_sources.count("/dev/urandom")
+        if random_passes:
+            # One spare slot so the producer stays ahead of every stripe
+            prefetch = PrefetchedSource(random_source, chunk_len, chunks * random_passes,
+                                        slots=stripes + 1)
+    except Exception:
+        random_source.close()
+        for m in constant_maps.values():
+            m.close()
+        os.close(fd)
+        raise
+    print(f"[*] Page cache: {'bypassed (O_DIRECT)' if direct else 'dropped after each chunk'}")
+    print(f"[*] Passes: {', '.join(pass_sources)}")
+
+    bounds = [chunks * i // stripes for i in range(stripes + 1)]
+    if stripes > 1:
+        print(f"[*] Writing {stripes} stripes concurrently")
+    ctx = {
+        "fd": fd, "direct": direct, "passes": pass_sources, "chunk_len": chunk_len,
+        "chunks": chunks, "device_size": device_size, "constant_maps": constant_maps,
+        "prefetch": prefetch, "offload_zero": is_block_device(device_path),
+        "failed": threading.Event(), "lock": threading.Lock(),
+        "done": 0, "last_print": 0.0,
+    }
+    try:
+        with ThreadPoolExecutor(max_workers=stripes) as pool:
+            futures = [pool.submit(run_stripe, ctx, range(bounds[i], bounds[i + 1]))
+                       for i in range(stripes)]
+        # A stripe that raised counts as a failed wipe, like one that returned False
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"\n[!] Wipe stripe failed: {e}")
+                results.append(False)
+        if not all(results):
+            return False
+        print()
+    finally:
+        if prefetch is not None:
+            prefetch.close()
+        random_source.close()
+        for m in constant_maps.values():
+            m.close()
+        os.close(fd)
+
+    # Flash media: let the controller erase remapped/stale cells as well
+    if not device_info.get("rotational", True):
+        print("[*] Non-rotational device, issuing discard (TRIM)...")
+        # Recorded for the certificate, which must not claim a discard that failed
+        device_info["discarded"] = discard_device(device_path, device_size)
 
     print("[✔] Wipe completed successfully")
     return True
 
-def generate_certificate(device_info, passes, completed=True):
-    """Generate JSON certificate for completed wipe."""
+def dumps_cert(cert, indent=False, sort_keys=False):
+    """Serialize a certificate dict to UTF-8 JSON bytes, using orjson when available.
+
+    Without indent the output is compact, and identical with or without orjson.
+    """
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(cert, option=option)
+    if indent:
+        return json.dumps(cert, indent=2, sort_keys=sort_keys, ensure_ascii=False).encode("utf-8")
+    return json.dumps(cert, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def generate_certificate(device_info, passes, completed=True, wipe_id=None, started_at=None):
+    """Generate JSON certificate for completed wipe.
+
+    wipe_id/started_at are captured when the wipe starts; they are generated
+    here only if the caller did not provide them.
+    """
     os.makedirs(CERTS_DIR, exist_ok=True)
-    wipe_id = str(uuid.uuid4())
+    wipe_id = wipe_id or str(uuid.uuid4())
     
+    rotational = device_info.get("rotational", True)
+    discarded = device_info.get("discarded", False)
+    if rotational:
+        method = f"US DoD 5220.22-M ({passes}-pass overwrite, progressive)"
+    elif discarded:
+        method = f"Random overwrite ({passes}-pass) + discard (non-rotational media)"
+    else:
+        method = f"Random overwrite ({passes}-pass, non-rotational media)"
+
     cert = {
         "wipe_id": wipe_id,
         "device": device_info["name"],
         "device_size": device_info["size_gb"],
-        "method": f"US DoD 5220.22-M ({passes}-pass overwrite, progressive)",
+        "method": method,
         "passes": passes,
+        "rotational": rotational,
+        "discarded": discarded,
         "completed": completed,
+        "started": started_at,
         "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        "hash": uuid.uuid5(uuid.NAMESPACE_DNS, wipe_id).hex
     }
+    # One SHA-256 over the canonical certificate body, so the hash covers every field
+    cert["hash"] = hashlib.sha256(dumps_cert(cert, sort_keys=True)).hexdigest()
 
+    # Written beside the final name and renamed, so the certificate appears whole
     cert_path = os.path.join(CERTS_DIR, f"{wipe_id}.json")
-    with open(cert_path, "w") as f:
-        json.dump(cert, f, indent=4)
+    tmp_path = cert_path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, dumps_cert(cert, indent=True))
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, cert_path)
 
     print(f"[+] Certificate saved: {cert_path}")
     return cert_path
@@ -159,13 +521,19 @@ if __name__ == "__main__":
         print("No devices detected.")
 
     print("\nOptions:")
-    print("1. Wipe a device (US DoD 3-pass, progressive)")
+    print("1. Wipe a device (US DoD 3-pass, progressive; 1 random pass + discard on SSD/flash)")
     choice = input("Select option: ")
 
     if choice == "1":
-        device_info = choose_device()
+        device_info = choose_device(devices)
         if device_info:
-            success = wipe_device_progressive(device_info, passes=3)
-            generate_certificate(device_info, passes=3, completed=success)
+            # Multi-pass overwrite only helps on magnetic media; on flash a single
+            # random pass followed by a discard is as effective and 3x faster
+            passes = 3 if device_info.get("rotational", True) else 1
+            wipe_id = str(uuid.uuid4())
+            started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            success = wipe_device_progressive(device_info, passes=passes)
+            generate_certificate(device_info, passes=passes, completed=success,
+                                 wipe_id=wipe_id, started_at=started_at)
     else:
         print("[!] Invalid option.")
\ No newline at end of file
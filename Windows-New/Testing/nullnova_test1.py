@@ -10,16 +10,21 @@ Features:
 """
 
 import sys
-import os
 import ctypes
 import json
 import hashlib
 import psutil
 import uuid
 import datetime
+import time
 import random
 import subprocess
-from PyQt5 import QtWidgets, QtCore, QtGui
+from PyQt5 import QtWidgets, QtGui
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Windows API constants
 GENERIC_WRITE = 0x40000000
@@ -28,13 +33,55 @@ FILE_SHARE_READ = 1
 FILE_SHARE_WRITE = 2
 FILE_FLAG_NO_BUFFERING = 0x20000000
 FILE_FLAG_WRITE_THROUGH = 0x80000000
+FILE_BEGIN = 0
+BCRYPT_USE_SYSTEM_PREFERRED_RNG = 0x00000002
+MEM_COMMIT = 0x1000
+MEM_RESERVE = 0x2000
+MEM_RELEASE = 0x8000
+PAGE_READWRITE = 0x04
 
 INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
 
 kernel32 = ctypes.windll.kernel32
+bcrypt = ctypes.windll.bcrypt
+
+kernel32.VirtualAlloc.restype = ctypes.c_void_p
+kernel32.VirtualAlloc.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong, ctypes.c_ulong]
+kernel32.VirtualFree.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong]
+
+# Utility: page-aligned buffer (required by FILE_FLAG_NO_BUFFERING)
+def alloc_aligned(size):
+    addr = kernel32.VirtualAlloc(None, size, MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE)
+    if not addr:
+        raise MemoryError("VirtualAlloc failed.")
+    return (ctypes.c_ubyte * size).from_address(addr)
+
+def free_aligned(buf):
+    kernel32.VirtualFree(ctypes.addressof(buf), 0, MEM_RELEASE)
+
+# Utility: one wipe buffer per chunk size, kept until the app exits
+# so repeated wipes (e.g. several drives) don't reallocate it
+_wipe_buffers = {}
+
+def get_wipe_buffer(size):
+    buf = _wipe_buffers.get(size)
+    if buf is None:
+        buf = _wipe_buffers[size] = alloc_aligned(size)
+    return buf
+
+def release_wipe_buffers():
+    for buf in _wipe_buffers.values():
+        free_aligned(buf)
+    _wipe_buffers.clear()
 
 # Utility: get drives
-def list_drives():
+# Partition scans are cached briefly so repeated refreshes don't re-enumerate
+DRIVES_CACHE_TTL = 2.0
+_drives_cache = {"t": 0.0, "v": []}
+
+def list_drives(force=False):
+    if not force and time.monotonic() - _drives_cache["t"] < DRIVES_CACHE_TTL:
+        return _drives_cache["v"]
     drives = []
     for disk in psutil.disk_partitions(all=True):
         drives.append({
@@ -42,16 +89,25 @@ def list_drives():
             "mountpoint": disk.mountpoint,
             "fstype": disk.fstype
         })
+    _drives_cache["t"] = time.monotonic()
+    _drives_cache["v"] = drives
     return drives
 
+# Utility: report JSON as bytes (orjson when installed)
+def dumps_report(report):
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    return json.dumps(report, indent=2, ensure_ascii=False).encode("utf-8")
+
 # Utility: wipe core
-def wipe_drive(path, method="zero", simulate=True, chunk_mb=64, callback=None):
+def wipe_drive(path, method="zero", simulate=True, chunk_mb=64, callback=None, verify=False):
     """
     path: raw path like \\.\PhysicalDrive1 or \\.\X:
     method: zero | random | pattern | dod
     simulate: if True, just simulate
     chunk_mb: chunk size in MB
     callback: progress reporting function
+    verify: if True, SHA-256 every byte written (hashlib -> OpenSSL, SHA-NI where available)
     """
 
     # JSON report
@@ -78,10 +134,12 @@ def wipe_drive(path, method="zero", simulate=True, chunk_mb=64, callback=None):
 
         chunk_size = chunk_mb * 1024 * 1024
         bytes_written = 0
+        last_progress = -1
 
-        # Buffers
-        zero_buf = b"\x00" * chunk_size
-        pattern_buf = (b"\xAA" * chunk_size)
+        # Shared page-aligned wipe buffer, refilled in place only when the pattern changes.
+        # Its contents are unknown here since a previous wipe may have used it.
+        buf = get_wipe_buffer(chunk_size)
+        buf_pattern = -1
         
         if not simulate:
             handle = kernel32.CreateFileW(
@@ -97,53 +155,76 @@ def wipe_drive(path, method="zero", simulate=True, chunk_mb=64, callback=None):
             if handle == INVALID_HANDLE_VALUE:
                 raise OSError("Failed to open drive. Run as Administrator.")
 
-        while bytes_written < total_size:
-            # Pick buffer
-            if method == "zero":
-                buf = zero_buf
-            elif method == "pattern":
-                buf = pattern_buf
-            elif method == "random":
-                buf = os.urandom(chunk_size)
-            elif method == "dod":
-                # DoD 3-pass: zero, one, random
-                pass_num = (bytes_written // total_size) % 3
-                if pass_num == 0:
-                    buf = zero_buf
-                elif pass_num == 1:
-                    buf = pattern_buf
-                else:
-                    buf = os.urandom(chunk_size)
-            else:
-                buf = zero_buf
+        # Fill value for each pass (None = random)
+        passes = {
+            "zero": [0x00],
+            "pattern": [0xAA],
+            "random": [None],
+            "dod": [0x00, 0xAA, None],  # DoD 3-pass: zero, one, random
+        }.get(method, [0x00])
+        total_bytes = total_size * len(passes)
+        t_start = time.perf_counter()
+        hasher = hashlib.sha256() if verify else None
+
+        for pattern in passes:
+            if pattern is not None and pattern != buf_pattern:
+                ctypes.memset(buf, pattern, chunk_size)
+                buf_pattern = pattern
 
             if not simulate:
-                written = ctypes.c_ulong(0)
-                success = kernel32.WriteFile(
-                    handle,
-                    buf,
-                    len(buf),
-                    ctypes.byref(written),
-                    None
-                )
-                if not success:
-                    raise OSError("WriteFile failed.")
-            else:
-                # Just sleep a little to simulate work
-                QtCore.QThread.msleep(10)
-
-            bytes_written += len(buf)
-            progress = int((bytes_written / total_size) * 100)
-            if callback:
-                callback(progress)
+                # Every pass starts again from the beginning of the drive
+                if not kernel32.SetFilePointerEx(handle, ctypes.c_longlong(0), None, FILE_BEGIN):
+                    raise OSError("SetFilePointerEx failed.")
+
+            pass_written = 0
+            while pass_written < total_size:
+                # Final partial chunk: write only what is left instead of running past the end
+                to_write = min(chunk_size, total_size - pass_written)
+
+                if pattern is None:
+                    status = bcrypt.BCryptGenRandom(None, buf, to_write, BCRYPT_USE_SYSTEM_PREFERRED_RNG)
+                    if status != 0:
+                        raise OSError("BCryptGenRandom failed.")
+                    buf_pattern = None
+
+                if hasher:
+                    hasher.update(memoryview(buf)[:to_write])
+
+                if not simulate:
+                    written = ctypes.c_ulong(0)
+                    success = kernel32.WriteFile(
+                        handle,
+                        buf,
+                        to_write,
+                        ctypes.byref(written),
+                        None
+                    )
+                    if not success:
+                        raise OSError("WriteFile failed.")
+                elif pattern is not None:
+                    # Simulation: refill the chunk in memory instead of sleeping, so the
+                    # run measures real fill throughput (random chunks are already generated)
+                    ctypes.memset(buf, pattern, to_write)
+
+                pass_written += to_write
+                bytes_written += to_write
+                progress = bytes_written * 100 // total_bytes
+                if callback and progress != last_progress:
+                    callback(progress)
+                    last_progress = progress
 
         if not simulate:
             kernel32.CloseHandle(handle)
 
         report["status"] = "success"
+        report["passes"] = len(passes)
         report["bytes_written"] = bytes_written
+        elapsed = time.perf_counter() - t_start
+        report["throughput_mb_s"] = round(bytes_written / (1024 * 1024) / elapsed, 1) if elapsed > 0 else None
         report["end_time"] = datetime.datetime.now().isoformat()
         report["hash"] = hashlib.sha256(report["job_id"].encode()).hexdigest()
+        if hasher:
+            report["data_sha256"] = hasher.hexdigest()
 
     except Exception as e:
         report["status"] = "failed"
@@ -177,6 +258,9 @@ class NullNova(QtWidgets.QWidget):
         self.simulate_checkbox.setChecked(True)
         layout.addWidget(self.simulate_checkbox)
 
+        self.verify_checkbox = QtWidgets.QCheckBox("Hash Written Data (SHA-256)")
+        layout.addWidget(self.verify_checkbox)
+
         self.start_btn = QtWidgets.QPushButton("Start Wipe")
         self.start_btn.clicked.connect(self.start_wipe)
         layout.addWidget(self.start_btn)
@@ -209,17 +293,19 @@ class NullNova(QtWidgets.QWidget):
         drive = selected.text().split(" - ")[0]
         method = self.method_combo.currentText()
         simulate = self.simulate_checkbox.isChecked()
+        verify = self.verify_checkbox.isChecked()
 
         self.log_msg(f"Starting wipe on {drive} with method={method}, simulate={simulate}")
 
         def update_progress(p):
             self.progress.setValue(p)
 
-        report = wipe_drive(drive, method=method, simulate=simulate, callback=update_progress)
+        report = wipe_drive(drive, method=method, simulate=simulate, callback=update_progress, verify=verify)
 
-        self.log_msg(json.dumps(report, indent=2))
-        with open(f"nullnova_report_{report['job_id']}.json", "w") as f:
-            json.dump(report, f, indent=2)
+        data = dumps_report(report)
+        self.log_msg(data.decode("utf-8"))
+        with open(f"nullnova_report_{report['job_id']}.json", "wb") as f:
+            f.write(data)
 
         self.log_msg(f"Report saved: nullnova_report_{report['job_id']}.json")
 
@@ -228,4 +314,6 @@ if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     win = NullNova()
     win.show()
-    sys.exit(app.exec_())
+    code = app.exec_()
+    release_wipe_buffers()
+    sys.exit(code)
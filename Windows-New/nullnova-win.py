@@ -1,6 +1,6 @@
 """
 NullNova - Windows safe/real drive wipe prototype (PyQt5)
-- Detects drives (uses WMI + psutil)
+- Detects drives (uses DeviceIoControl storage queries + psutil)
 - Simulate mode (default) and Real wipe mode (destructive)
 - Generates JSON report after each job
 
@@ -10,14 +10,15 @@ Make sure to run in VM or with test disks and run as Administrator.
 
 import sys
 import os
+import re
 import uuid
 import json
 import time
 import psutil
-import wmi
 import hashlib
-import datetime
-import subprocess
+import threading
+import queue
+import collections
 import ctypes
 from ctypes import wintypes
 import msvcrt
@@ -26,7 +27,17 @@ from PyQt5.QtWidgets import (
     QListWidget, QMessageBox, QProgressBar, QHBoxLayout, QRadioButton,
     QButtonGroup, QLineEdit, QCheckBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+
+try:
+    from Crypto.Cipher import AES
+except ImportError:  # pycryptodome missing: wipe data comes straight from BCryptGenRandom
+    AES = None
+
+try:
+    import orjson
+except ImportError:  # reports fall back to the stdlib json encoder
+    orjson = None
 
 # Windows API Constants
 GENERIC_READ = 0x80000000
@@ -37,37 +48,288 @@ OPEN_EXISTING = 3
 FILE_ATTRIBUTE_NORMAL = 0x80
 FILE_FLAG_NO_BUFFERING = 0x20000000
 FILE_FLAG_WRITE_THROUGH = 0x80000000
-INVALID_HANDLE_VALUE = -1
+FILE_FLAG_OVERLAPPED = 0x40000000
+INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+# Number of overlapped writes kept in flight during a real wipe
+WIPE_QUEUE_DEPTH = 4
+
+# Minimum seconds between progress signals from the wipe loop
+PROGRESS_EMIT_INTERVAL = 0.1
+LOG_FLUSH_INTERVAL_MS = 100  # log lines are added to the list at most this often
+CLOSE_WAIT_MS = 5000  # how long closing the window waits for a cancelled wipe to stop
+
+# Win32 error codes
+ERROR_FILE_NOT_FOUND = 2
+ERROR_ACCESS_DENIED = 5
+ERROR_SHARING_VIOLATION = 32
+ERROR_IO_PENDING = 997
+
+BCRYPT_USE_SYSTEM_PREFERRED_RNG = 0x00000002
+
+# System handle table snapshot
+SystemExtendedHandleInformation = 0x40
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+PROCESS_DUP_HANDLE = 0x0040
+DUPLICATE_SAME_ACCESS = 0x00000002
+FILE_TYPE_DISK = 0x0001
+
+# VirtualAlloc
+MEM_COMMIT = 0x1000
+MEM_RESERVE = 0x2000
+MEM_RELEASE = 0x8000
+PAGE_READWRITE = 0x04
+
+# Storage property queries
+IOCTL_STORAGE_QUERY_PROPERTY = 0x002D1400
+IOCTL_DISK_GET_DRIVE_GEOMETRY_EX = 0x000700A0
+IOCTL_DISK_GET_LENGTH_INFO = 0x0007405C
+IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS = 0x00560000
+FSCTL_LOCK_VOLUME = 0x00090018
+FSCTL_DISMOUNT_VOLUME = 0x00090020
+StorageDeviceProperty = 0
+StorageAccessAlignmentProperty = 6
+StorageDeviceSeekPenaltyProperty = 7
+PropertyStandardQuery = 0
+
+# Firmware sanitize (Windows 10 2004+); blocks until the drive finishes
+IOCTL_STORAGE_REINITIALIZE_MEDIA = 0x002D9640
+SANITIZE_TIMEOUT_SECONDS = 3600
+
+# TRIM of the whole device after an SSD overwrite
+IOCTL_STORAGE_MANAGE_DATA_SET_ATTRIBUTES = 0x002D9404
+DeviceDsmAction_Trim = 1
+DEVICE_DSM_FLAG_ENTIRE_DATA_SET_RANGE = 0x00000001
+
+# Highest PhysicalDriveN probed during enumeration
+MAX_PHYSICAL_DRIVES = 64
+
+# \\.\PhysicalDriveN, \\?\PHYSICALDRIVEN or a bare PhysicalDriveN
+_PHYS_RE = re.compile(r"^(?:\\\\[.?]\\)?PHYSICALDRIVE(\d+)$", re.IGNORECASE)
+
+# Seconds a disk scan is reused by Refresh (Rescan always re-enumerates)
+DISK_CACHE_TTL = 10.0
+_disk_cache = {"ts": 0.0, "data": []}
+
+# ctypes prototypes for the Win32 calls on the wipe path. Declared once so ctypes
+# does not guess argument types on every call and HANDLE results keep all 64 bits.
+_kernel32 = ctypes.windll.kernel32
+_kernel32.CreateFileW.argtypes = [
+    wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+    wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE
+]
+_kernel32.CreateFileW.restype = wintypes.HANDLE
+_kernel32.WriteFile.argtypes = [
+    wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD,
+    ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p
+]
+_kernel32.WriteFile.restype = wintypes.BOOL
+_kernel32.DeviceIoControl.argtypes = [
+    wintypes.HANDLE, wintypes.DWORD, ctypes.c_void_p, wintypes.DWORD,
+    ctypes.c_void_p, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p
+]
+_kernel32.DeviceIoControl.restype = wintypes.BOOL
+_kernel32.GetOverlappedResult.argtypes = [
+    wintypes.HANDLE, ctypes.c_void_p, ctypes.POINTER(wintypes.DWORD), wintypes.BOOL
+]
+_kernel32.GetOverlappedResult.restype = wintypes.BOOL
+_kernel32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+_kernel32.CreateEventW.restype = wintypes.HANDLE
+_kernel32.ResetEvent.argtypes = [wintypes.HANDLE]
+_kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+_kernel32.CloseHandle.restype = wintypes.BOOL
+_kernel32.GetLastError.argtypes = []
+_kernel32.GetLastError.restype = wintypes.DWORD
+_kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, ctypes.c_void_p]
+_kernel32.CancelIoEx.restype = wintypes.BOOL
+_kernel32.FlushFileBuffers.argtypes = [wintypes.HANDLE]
+_kernel32.FlushFileBuffers.restype = wintypes.BOOL
+_kernel32.VirtualAlloc.argtypes = [ctypes.c_void_p, ctypes.c_size_t, wintypes.DWORD, wintypes.DWORD]
+_kernel32.VirtualAlloc.restype = ctypes.c_void_p
+_kernel32.VirtualFree.argtypes = [ctypes.c_void_p, ctypes.c_size_t, wintypes.DWORD]
+_kernel32.VirtualFree.restype = wintypes.BOOL
+_kernel32.FindFirstVolumeW.argtypes = [wintypes.LPWSTR, wintypes.DWORD]
+_kernel32.FindFirstVolumeW.restype = wintypes.HANDLE
+_kernel32.FindNextVolumeW.argtypes = [wintypes.HANDLE, wintypes.LPWSTR, wintypes.DWORD]
+_kernel32.FindNextVolumeW.restype = wintypes.BOOL
+_kernel32.FindVolumeClose.argtypes = [wintypes.HANDLE]
+_kernel32.FindVolumeClose.restype = wintypes.BOOL
+
+class OVERLAPPED(ctypes.Structure):
+    _fields_ = [
+        ("Internal", ctypes.c_void_p),
+        ("InternalHigh", ctypes.c_void_p),
+        ("Offset", wintypes.DWORD),
+        ("OffsetHigh", wintypes.DWORD),
+        ("hEvent", wintypes.HANDLE),
+    ]
+
+class SYSTEM_HANDLE_TABLE_ENTRY_INFO_EX(ctypes.Structure):
+    _fields_ = [
+        ("Object", ctypes.c_void_p),
+        ("UniqueProcessId", ctypes.c_size_t),
+        ("HandleValue", ctypes.c_size_t),
+        ("GrantedAccess", wintypes.ULONG),
+        ("CreatorBackTraceIndex", wintypes.USHORT),
+        ("ObjectTypeIndex", wintypes.USHORT),
+        ("HandleAttributes", wintypes.ULONG),
+        ("Reserved", wintypes.ULONG),
+    ]
+
+class SYSTEM_HANDLE_INFORMATION_EX(ctypes.Structure):
+    _fields_ = [
+        ("NumberOfHandles", ctypes.c_size_t),
+        ("Reserved", ctypes.c_size_t),
+    ]
+
+class STORAGE_PROPERTY_QUERY(ctypes.Structure):
+    _fields_ = [
+        ("PropertyId", wintypes.DWORD),
+        ("QueryType", wintypes.DWORD),
+        ("AdditionalParameters", ctypes.c_ubyte * 1),
+    ]
+
+class STORAGE_DEVICE_DESCRIPTOR(ctypes.Structure):
+    _fields_ = [
+        ("Version", wintypes.DWORD),
+        ("Size", wintypes.DWORD),
+        ("DeviceType", wintypes.BYTE),
+        ("DeviceTypeModifier", wintypes.BYTE),
+        ("RemovableMedia", wintypes.BOOLEAN),
+        ("CommandQueueing", wintypes.BOOLEAN),
+        ("VendorIdOffset", wintypes.DWORD),
+        ("ProductIdOffset", wintypes.DWORD),
+        ("ProductRevisionOffset", wintypes.DWORD),
+        ("SerialNumberOffset", wintypes.DWORD),
+        ("BusType", wintypes.DWORD),
+        ("RawPropertiesLength", wintypes.DWORD),
+        ("RawDeviceProperties", ctypes.c_ubyte * 1),
+    ]
+
+class DEVICE_SEEK_PENALTY_DESCRIPTOR(ctypes.Structure):
+    _fields_ = [
+        ("Version", wintypes.DWORD),
+        ("Size", wintypes.DWORD),
+        ("IncursSeekPenalty", wintypes.BOOLEAN),
+    ]
+
+class DISK_GEOMETRY(ctypes.Structure):
+    _fields_ = [
+        ("Cylinders", ctypes.c_longlong),
+        ("MediaType", wintypes.DWORD),
+        ("TracksPerCylinder", wintypes.DWORD),
+        ("SectorsPerTrack", wintypes.DWORD),
+        ("BytesPerSector", wintypes.DWORD),
+    ]
+
+class DISK_GEOMETRY_EX(ctypes.Structure):
+    _fields_ = [
+        ("Geometry", DISK_GEOMETRY),
+        ("DiskSize", ctypes.c_longlong),
+        ("Data", ctypes.c_ubyte * 1),
+    ]
+
+class DISK_EXTENT(ctypes.Structure):
+    _fields_ = [
+        ("DiskNumber", wintypes.DWORD),
+        ("StartingOffset", ctypes.c_longlong),
+        ("ExtentLength", ctypes.c_longlong),
+    ]
+
+class VOLUME_DISK_EXTENTS(ctypes.Structure):
+    _fields_ = [
+        ("NumberOfDiskExtents", wintypes.DWORD),
+        ("Extents", DISK_EXTENT * 8),
+    ]
+
+class STORAGE_REINITIALIZE_MEDIA(ctypes.Structure):
+    _fields_ = [
+        ("Version", wintypes.DWORD),
+        ("Size", wintypes.DWORD),
+        ("TimeoutInSeconds", wintypes.DWORD),
+        ("SanitizeMethod", wintypes.DWORD, 4),
+        ("DisallowUnrestrictedSanitize", wintypes.DWORD, 1),
+        ("Reserved", wintypes.DWORD, 27),
+    ]
+
+class DEVICE_MANAGE_DATA_SET_ATTRIBUTES(ctypes.Structure):
+    _fields_ = [
+        ("Size", wintypes.DWORD),
+        ("Action", wintypes.DWORD),
+        ("Flags", wintypes.DWORD),
+        ("ParameterBlockOffset", wintypes.DWORD),
+        ("ParameterBlockLength", wintypes.DWORD),
+        ("DataSetRangesOffset", wintypes.DWORD),
+        ("DataSetRangesLength", wintypes.DWORD),
+    ]
+
+class STORAGE_ACCESS_ALIGNMENT_DESCRIPTOR(ctypes.Structure):
+    _fields_ = [
+        ("Version", wintypes.DWORD),
+        ("Size", wintypes.DWORD),
+        ("BytesPerCacheLine", wintypes.DWORD),
+        ("BytesOffsetForCacheAlignment", wintypes.DWORD),
+        ("BytesPerLogicalSector", wintypes.DWORD),
+        ("BytesPerPhysicalSector", wintypes.DWORD),
+        ("BytesOffsetForSectorAlignment", wintypes.DWORD),
+    ]
+
+# Exponential backoff used while waiting for volumes/devices to become available
+BACKOFF_INITIAL_DELAY = 0.05  # seconds
+BACKOFF_MAX_DELAY = 1.0  # seconds
 
 # -------------------------
 # Low-level file operations using Windows API
 # -------------------------
-def open_physical_drive_handle(device_path):
+def parse_physical_device(path):
+    """
+    Parse a physical drive path in any common spelling.
+    Returns (canonical_path, drive_number) tuple; raises ValueError if the
+    path does not name a physical drive.
+    """
+    m = _PHYS_RE.match(path.strip())
+    if not m:
+        raise ValueError(f"Invalid device path format (missing PhysicalDrive): {path}")
+    number = int(m.group(1))
+    return f"\\\\.\\PhysicalDrive{number}", number
+
+def open_physical_drive_handle(device_path, sharing_retries=3, overlapped=False):
     """
     Open a handle to a physical drive using Windows API.
+    A sharing violation (a handle still being released) is retried briefly.
+    With overlapped=True the handle is opened for asynchronous I/O.
     Returns (handle, error_message) tuple.
     """
     kernel32 = ctypes.windll.kernel32
+    flags = FILE_FLAG_NO_BUFFERING | FILE_FLAG_WRITE_THROUGH
+    if overlapped:
+        flags |= FILE_FLAG_OVERLAPPED
     
     try:
-        # Open with exclusive access and no buffering for direct disk access
-        handle = kernel32.CreateFileW(
-            device_path,
-            GENERIC_READ | GENERIC_WRITE,
-            0,  # No sharing - exclusive access
-            None,
-            OPEN_EXISTING,
-            FILE_FLAG_NO_BUFFERING | FILE_FLAG_WRITE_THROUGH,
-            None
-        )
+        for attempt in range(sharing_retries + 1):
+            # Open with exclusive access and no buffering for direct disk access
+            handle = kernel32.CreateFileW(
+                device_path,
+                GENERIC_READ | GENERIC_WRITE,
+                0,  # No sharing - exclusive access
+                None,
+                OPEN_EXISTING,
+                flags,
+                None
+            )
+            if handle != INVALID_HANDLE_VALUE:
+                break
+            error_code = kernel32.GetLastError()
+            if error_code != ERROR_SHARING_VIOLATION or attempt == sharing_retries:
+                break
+            time.sleep(BACKOFF_INITIAL_DELAY)
         
         if handle == INVALID_HANDLE_VALUE:
-            error_code = kernel32.GetLastError()
-            if error_code == 2:  # File not found
+            if error_code == ERROR_FILE_NOT_FOUND:
                 return None, f"Device not found: {device_path}"
-            elif error_code == 5:  # Access denied
+            elif error_code == ERROR_ACCESS_DENIED:
                 return None, f"Access denied. Run as Administrator: {device_path}"
-            elif error_code == 32:  # Sharing violation
+            elif error_code == ERROR_SHARING_VIOLATION:
                 return None, f"Device is in use by another process: {device_path}"
             else:
                 return None, f"Failed to open device (Error {error_code}): {device_path}"
@@ -77,9 +339,10 @@ def open_physical_drive_handle(device_path):
     except Exception as e:
         return None, f"Exception opening device: {e}"
 
-def write_to_physical_drive(handle, data):
+def write_to_physical_drive(handle, data, size=None):
     """
     Write data to physical drive using Windows API.
+    If size is given only the first size bytes of data are written.
     Returns (bytes_written, error_message) tuple.
     """
     kernel32 = ctypes.windll.kernel32
@@ -89,7 +352,7 @@ def write_to_physical_drive(handle, data):
         result = kernel32.WriteFile(
             handle,
             data,
-            len(data),
+            len(data) if size is None else size,
             ctypes.byref(bytes_written),
             None
         )
@@ -103,6 +366,199 @@ def write_to_physical_drive(handle, data):
     except Exception as e:
         return 0, f"Exception during write: {e}"
 
+def alloc_aligned(size):
+    """
+    Allocate a zeroed, page-aligned ctypes buffer with VirtualAlloc.
+    FILE_FLAG_NO_BUFFERING writes require sector-aligned buffers, which
+    Python allocations do not guarantee. Release with free_aligned().
+    """
+    addr = _kernel32.VirtualAlloc(None, size, MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE)
+    if not addr:
+        raise MemoryError(f"VirtualAlloc failed for {size} bytes (Error {_kernel32.GetLastError()})")
+    return (ctypes.c_ubyte * size).from_address(addr)
+
+def free_aligned(buf):
+    """
+    Release a buffer returned by alloc_aligned().
+    """
+    _kernel32.VirtualFree(ctypes.addressof(buf), 0, MEM_RELEASE)
+
+def utc_timestamp():
+    """
+    Current UTC time as an ISO 8601 string with second precision, e.g. 2024-01-31T12:00:00Z.
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def dumps_report(report, indent=False, sort_keys=False):
+    """
+    Serialize a report dict to UTF-8 JSON bytes, using orjson when available.
+    """
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(report, option=option)
+    if indent:
+        return json.dumps(report, indent=2, sort_keys=sort_keys, ensure_ascii=False).encode("utf-8")
+    return json.dumps(report, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def hash_report(report):
+    """
+    SHA-256 hex digest of the canonical (sorted, compact) report JSON.
+    Without orjson the stdlib encoder output is hashed piece by piece instead
+    of being joined into one string first.
+    """
+    if orjson is not None:
+        return hashlib.sha256(dumps_report(report, sort_keys=True)).hexdigest()
+    h = hashlib.sha256()
+    encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    for piece in encoder.iterencode(report):
+        h.update(piece.encode("utf-8"))
+    return h.hexdigest()
+
+def fill_random(buf, size):
+    """
+    Fill the first size bytes of a ctypes buffer in place with the system CSPRNG.
+    """
+    status = ctypes.windll.bcrypt.BCryptGenRandom(
+        None, buf, size, BCRYPT_USE_SYSTEM_PREFERRED_RNG
+    )
+    if status != 0:
+        raise OSError(f"BCryptGenRandom failed (NTSTATUS 0x{status & 0xFFFFFFFF:08X})")
+
+class RandomStream:
+    """
+    Wipe-data generator: AES-256-CTR keystream seeded once per job from the
+    system CSPRNG, so each chunk costs one AES-NI pass instead of a
+    BCryptGenRandom call. Falls back to BCryptGenRandom without pycryptodome.
+    """
+
+    def __init__(self, chunk_size):
+        self._zeros = memoryview(bytes(chunk_size))
+        self._cipher = None
+        if AES is not None:
+            self._cipher = AES.new(os.urandom(32), AES.MODE_CTR, nonce=os.urandom(8))
+
+    def fill(self, buf, size):
+        """Fill the first size bytes of a ctypes buffer in place."""
+        if self._cipher is None:
+            fill_random(buf, size)
+            return
+        # CTR keystream XOR zeros == keystream, written directly into buf
+        self._cipher.encrypt(self._zeros[:size], output=memoryview(buf).cast("B")[:size])
+
+class PrefetchedBuffers:
+    """
+    Multi-buffered wipe data: a background thread fills the next buffer
+    from the RandomStream while the others are being written to disk.
+    The buffers are owned by the caller and must all be the same size.
+    """
+
+    def __init__(self, stream, buffers, count):
+        self._stream = stream
+        self._chunk_size = len(buffers[0])
+        self.buffers = buffers
+        self._empty = queue.Queue()
+        self._full = queue.Queue()
+        for i in range(len(buffers)):
+            self._empty.put(i)
+        self._thread = threading.Thread(target=self._produce, args=(count,), daemon=True)
+        self._thread.start()
+
+    def _produce(self, count):
+        try:
+            for _ in range(count):
+                i = self._empty.get()
+                if i is None:
+                    return
+                self._stream.fill(self.buffers[i], self._chunk_size)
+                self._full.put(i)
+        except Exception as e:
+            self._full.put(e)
+
+    def get(self):
+        """Wait for the next filled buffer and return its slot index."""
+        item = self._full.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def release(self, i):
+        """Hand a written buffer back to the producer for refilling."""
+        self._empty.put(i)
+
+    def close(self):
+        """Stop the producer thread."""
+        self._empty.put(None)
+        self._thread.join()
+
+class OverlappedWriter:
+    """
+    Keeps several WriteFile requests in flight on a handle opened with
+    FILE_FLAG_OVERLAPPED, so the device sees a queue depth above one.
+    Completions are collected oldest-first.
+    """
+
+    def __init__(self, handle, depth=WIPE_QUEUE_DEPTH):
+        self._kernel32 = ctypes.windll.kernel32
+        self._handle = handle
+        self.depth = depth
+        self._free = []
+        self._pending = collections.deque()
+        for _ in range(depth):
+            ov = OVERLAPPED()
+            ov.hEvent = self._kernel32.CreateEventW(None, True, False, None)
+            if not ov.hEvent:
+                self.close()
+                raise OSError(f"CreateEventW failed (Error {self._kernel32.GetLastError()})")
+            self._free.append(ov)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def submit(self, buf, size, offset, tag=None):
+        """Queue an asynchronous write of size bytes from buf at offset."""
+        ov = self._free.pop()
+        ov.Offset = offset & 0xFFFFFFFF
+        ov.OffsetHigh = offset >> 32
+        self._kernel32.ResetEvent(ov.hEvent)
+        if not self._kernel32.WriteFile(self._handle, buf, size, None, ctypes.byref(ov)):
+            error_code = self._kernel32.GetLastError()
+            if error_code != ERROR_IO_PENDING:
+                self._free.append(ov)
+                raise OSError(f"Write failed (Error {error_code})")
+        self._pending.append((ov, tag))
+
+    def wait_oldest(self):
+        """Wait for the oldest write to finish. Returns (bytes_written, tag)."""
+        ov, tag = self._pending.popleft()
+        transferred = wintypes.DWORD()
+        ok = self._kernel32.GetOverlappedResult(
+            self._handle, ctypes.byref(ov), ctypes.byref(transferred), True
+        )
+        self._free.append(ov)
+        if not ok:
+            raise OSError(f"Write failed (Error {self._kernel32.GetLastError()})")
+        return transferred.value, tag
+
+    def cancel(self):
+        """Cancel outstanding writes and wait until the kernel releases their buffers."""
+        if self._pending:
+            self._kernel32.CancelIoEx(self._handle, None)
+        while self._pending:
+            ov, _ = self._pending.popleft()
+            transferred = wintypes.DWORD()
+            self._kernel32.GetOverlappedResult(
+                self._handle, ctypes.byref(ov), ctypes.byref(transferred), True
+            )
+            self._free.append(ov)
+
+    def close(self):
+        self.cancel()
+        for ov in self._free:
+            if ov.hEvent:
+                self._kernel32.CloseHandle(ov.hEvent)
+        self._free = []
+
 def close_physical_drive_handle(handle):
     """
     Close a physical drive handle.
@@ -121,35 +577,138 @@ def test_device_access(device_path):
         return False, error_msg
     
     try:
-        # Try to get device information
-        kernel32 = ctypes.windll.kernel32
-        bytes_returned = wintypes.DWORD()
-        
-        # Try a simple device control operation (GET_LENGTH_INFO)
+        if query_disk_length(handle):
+            return True, "Device is accessible"
+        return True, "Device opened successfully (but may have limited access)"
+    finally:
+        close_physical_drive_handle(handle)
+
+def device_io_control(handle, code, in_buffer, out_buffer):
+    """
+    Issue a DeviceIoControl request, filling out_buffer (a ctypes object).
+    in_buffer may be None. Works on both synchronous and overlapped handles.
+    Returns True on success.
+    """
+    kernel32 = ctypes.windll.kernel32
+    bytes_returned = wintypes.DWORD()
+    ov = OVERLAPPED()
+    ov.hEvent = kernel32.CreateEventW(None, True, False, None)
+    try:
         result = kernel32.DeviceIoControl(
             handle,
-            0x0007405C,  # IOCTL_DISK_GET_LENGTH_INFO
-            None, 0,
-            None, 0,
+            code,
+            ctypes.byref(in_buffer) if in_buffer is not None else None,
+            ctypes.sizeof(in_buffer) if in_buffer is not None else 0,
+            ctypes.byref(out_buffer), ctypes.sizeof(out_buffer),
             ctypes.byref(bytes_returned),
-            None
+            ctypes.byref(ov)
         )
-        
-        close_physical_drive_handle(handle)
-        
-        if result:
-            return True, "Device is accessible"
-        else:
-            return True, "Device opened successfully (but may have limited access)"
-            
+        if not result and kernel32.GetLastError() == ERROR_IO_PENDING:
+            result = kernel32.GetOverlappedResult(
+                handle, ctypes.byref(ov), ctypes.byref(bytes_returned), True
+            )
+        return bool(result)
+    finally:
+        if ov.hEvent:
+            kernel32.CloseHandle(ov.hEvent)
+
+def query_storage_property(handle, property_id, descriptor):
+    """
+    Fill a ctypes descriptor via IOCTL_STORAGE_QUERY_PROPERTY.
+    Returns True on success.
+    """
+    query = STORAGE_PROPERTY_QUERY(property_id, PropertyStandardQuery)
+    return device_io_control(handle, IOCTL_STORAGE_QUERY_PROPERTY, query, descriptor)
+
+def reinitialize_media(handle, timeout=SANITIZE_TIMEOUT_SECONDS):
+    """
+    Ask the drive firmware to sanitize all user data (block erase).
+    Returns (success, error_message) tuple.
+    """
+    req = STORAGE_REINITIALIZE_MEDIA()
+    req.Version = ctypes.sizeof(STORAGE_REINITIALIZE_MEDIA)
+    req.Size = ctypes.sizeof(STORAGE_REINITIALIZE_MEDIA)
+    req.TimeoutInSeconds = timeout
+    try:
+        if device_io_control(handle, IOCTL_STORAGE_REINITIALIZE_MEDIA, req, wintypes.DWORD()):
+            return True, None
+        return False, f"Sanitize not supported (Error {ctypes.windll.kernel32.GetLastError()})"
     except Exception as e:
-        close_physical_drive_handle(handle)
-        return False, f"Device access test failed: {e}"
+        return False, f"Exception during sanitize: {e}"
+
+def trim_device(handle):
+    """
+    TRIM (deallocate) every LBA of an open disk so the SSD controller can
+    erase stale copies of the data left behind by its flash translation layer.
+    Returns (success, error_message) tuple.
+    """
+    req = DEVICE_MANAGE_DATA_SET_ATTRIBUTES()
+    req.Size = ctypes.sizeof(DEVICE_MANAGE_DATA_SET_ATTRIBUTES)
+    req.Action = DeviceDsmAction_Trim
+    req.Flags = DEVICE_DSM_FLAG_ENTIRE_DATA_SET_RANGE
+    try:
+        if device_io_control(handle, IOCTL_STORAGE_MANAGE_DATA_SET_ATTRIBUTES, req, wintypes.DWORD()):
+            return True, None
+        return False, f"TRIM not supported (Error {ctypes.windll.kernel32.GetLastError()})"
+    except Exception as e:
+        return False, f"Exception during TRIM: {e}"
+
+def query_disk_length(handle):
+    """
+    Exact size in bytes of an open disk handle, or 0 if it cannot be queried.
+    """
+    length = ctypes.c_longlong(0)
+    try:
+        if device_io_control(handle, IOCTL_DISK_GET_LENGTH_INFO, None, length):
+            return int(length.value)
+    except Exception:
+        pass
+    return 0
+
+def query_sector_sizes(handle):
+    """
+    Query (logical, physical) sector sizes of an open disk handle.
+    Drivers without the alignment property report BytesPerSector through the
+    drive geometry instead. When the physical size is unknown it is assumed to
+    be 4096: aligning to 4K is correct for 512-byte and Advanced Format drives
+    alike, while the logical size keeps the tail write inside the device.
+    """
+    try:
+        desc = STORAGE_ACCESS_ALIGNMENT_DESCRIPTOR()
+        if query_storage_property(handle, StorageAccessAlignmentProperty, desc):
+            logical = desc.BytesPerLogicalSector or 512
+            physical = desc.BytesPerPhysicalSector or max(logical, 4096)
+            return logical, physical
+        geometry = DISK_GEOMETRY_EX()
+        if device_io_control(handle, IOCTL_DISK_GET_DRIVE_GEOMETRY_EX, None, geometry):
+            sector = geometry.Geometry.BytesPerSector or 512
+            return sector, max(sector, 4096)
+    except Exception:
+        pass
+    return 512, 4096
+
+def wait_for_device_access(device_path, attempts=8):
+    """
+    Open the device for wiping, backing off exponentially (50 ms, 100 ms,
+    200 ms, ... capped at 1 s) while the system releases handles after
+    unmounting. The handle is opened for overlapped I/O and kept for the wipe,
+    so there is no gap between probing and opening for a volume to remount in.
+    Returns (handle, error_message) tuple; handle is None on failure.
+    """
+    delay = BACKOFF_INITIAL_DELAY
+    error_msg = f"Device not accessible: {device_path}"
+    for attempt in range(attempts):
+        handle, error_msg = open_physical_drive_handle(device_path, overlapped=True)
+        if handle is not None or attempt == attempts - 1:
+            return handle, error_msg
+        time.sleep(delay)
+        delay = min(delay * 2, BACKOFF_MAX_DELAY)
+    return None, error_msg
 
 # -------------------------
 # Utility: Drive enumeration
 # -------------------------
-def enumerate_windows_disks():
+def enumerate_windows_disks(force=False):
     """
     Returns list of disk dicts:
     {
@@ -161,72 +720,111 @@ def enumerate_windows_disks():
         "media_type": "SSD" or "HDD" or "Unknown",
         "is_system": True/False
     }
+    Results are cached for DISK_CACHE_TTL seconds unless force is set.
     """
+    if not force and time.monotonic() - _disk_cache["ts"] < DISK_CACHE_TTL:
+        return _disk_cache["data"]
+
+    kernel32 = ctypes.windll.kernel32
     disks = []
-    c = wmi.WMI()
     try:
-        for disk in c.Win32_DiskDrive():
-            pd = {}
-            pd_path = getattr(disk, "DeviceID", None)  # e.g. \\.\PHYSICALDRIVE0
-            if not pd_path:
-                continue
-            # Normalize the device path - ensure proper format
-            # WMI can return various formats like: \\.\PHYSICALDRIVE0, \\.\PhysicalDrive0, etc.
-            pd_path = pd_path.replace("/", "\\")  # Convert any forward slashes
-            
-            # Remove leading backslashes and rebuild the path
-            pd_path = pd_path.lstrip("\\")
-            
-            # Extract just the drive part (e.g., "PHYSICALDRIVE0" or "PhysicalDrive0")
-            if pd_path.startswith(".\\"):
-                pd_path = pd_path[2:]  # Remove the ".\" part
-            
-            # Ensure it contains "PHYSICALDRIVE" (case insensitive)
-            if "physicaldrive" not in pd_path.lower():
-                print(f"Skipping invalid device path: {pd_path}")
+        letters_by_disk = map_drive_letters_to_disks()
+        system_drive = os.getenv("SystemDrive", "C:").upper()
+
+        for number in range(MAX_PHYSICAL_DRIVES):
+            pd_path = f"\\\\.\\PhysicalDrive{number}"
+            # Query-only handle: no read/write access needed for these IOCTLs
+            handle = kernel32.CreateFileW(
+                pd_path, 0, FILE_SHARE_READ | FILE_SHARE_WRITE,
+                None, OPEN_EXISTING, 0, None
+            )
+            if handle == INVALID_HANDLE_VALUE:
                 continue
-                
-            # Rebuild the path in the correct format
-            pd_path = f"\\\\.\\{pd_path}"
-            pd["physical_device"] = pd_path
-            
+            try:
+                pd = query_disk_info(handle)
+            finally:
+                kernel32.CloseHandle(handle)
+
             # Debug logging
             print(f"Enumerated device: {pd_path}")
-            
-            pd["model"] = getattr(disk, "Model", "") or ""
-            pd["serial"] = (getattr(disk, "SerialNumber", "") or "").strip()
-            pd["size_bytes"] = int(getattr(disk, "Size", 0) or 0)
-            pd["media_type"] = "Unknown"
-            pd["drive_letters"] = []
-
-            # Map partitions -> logical disks to get drive letters
-            try:
-                for part in disk.associators("Win32_DiskDriveToDiskPartition"):
-                    for ld in part.associators("Win32_LogicalDiskToPartition"):
-                        if getattr(ld, "DeviceID", None):
-                            pd["drive_letters"].append(getattr(ld, "DeviceID"))
-            except Exception:
-                pass
-
-            # Determine media type best-effort:
-            # check if any drive_letter corresponds to system root
-            pd["is_system"] = any(dl.upper() == os.getenv("SystemDrive", "C:").upper() for dl in pd["drive_letters"])
-            # heuristics for SSD vs HDD using MediaType or Model keywords
-            model_l = pd["model"].lower()
-            if "ssd" in model_l or "nvme" in model_l:
-                pd["media_type"] = "SSD"
-            else:
-                pd["media_type"] = "HDD"
 
+            pd["physical_device"] = pd_path
+            pd["drive_letters"] = letters_by_disk.get(number, [])
+            pd["is_system"] = any(dl.upper() == system_drive for dl in pd["drive_letters"])
             disks.append(pd)
     except Exception as e:
-        print("WMI enumeration failed:", e)
+        print("Disk enumeration failed:", e)
+        return disks
+    _disk_cache["ts"] = time.monotonic()
+    _disk_cache["data"] = disks
     return disks
 
+def query_disk_info(handle):
+    """
+    Read model, serial, size and media type of an open physical drive handle.
+    """
+    info = {"model": "", "serial": "", "size_bytes": 0, "media_type": "Unknown"}
+
+    raw = ctypes.create_string_buffer(1024)
+    if query_storage_property(handle, StorageDeviceProperty, raw):
+        desc = STORAGE_DEVICE_DESCRIPTOR.from_buffer(raw)
+
+        def read_str(offset):
+            if not offset or offset >= len(raw):
+                return ""
+            return raw.raw[offset:].split(b"\0", 1)[0].decode("ascii", "ignore").strip()
+
+        info["model"] = " ".join(filter(None, (read_str(desc.VendorIdOffset), read_str(desc.ProductIdOffset))))
+        info["serial"] = read_str(desc.SerialNumberOffset)
+
+    geometry = DISK_GEOMETRY_EX()
+    if device_io_control(handle, IOCTL_DISK_GET_DRIVE_GEOMETRY_EX, None, geometry):
+        info["size_bytes"] = int(geometry.DiskSize)
+
+    # Seek penalty distinguishes spinning disks from flash; fall back to
+    # model keywords when the driver does not report it
+    penalty = DEVICE_SEEK_PENALTY_DESCRIPTOR()
+    if query_storage_property(handle, StorageDeviceSeekPenaltyProperty, penalty):
+        info["media_type"] = "HDD" if penalty.IncursSeekPenalty else "SSD"
+    else:
+        model_l = info["model"].lower()
+        info["media_type"] = "SSD" if ("ssd" in model_l or "nvme" in model_l) else "HDD"
+
+    return info
+
+def map_drive_letters_to_disks():
+    """
+    Map physical disk number -> list of drive letters (e.g. {0: ["C:"]})
+    using the disk extents of each mounted volume.
+    """
+    kernel32 = ctypes.windll.kernel32
+    letters_by_disk = {}
+    mask = kernel32.GetLogicalDrives()
+    for i in range(26):
+        if not mask & (1 << i):
+            continue
+        letter = f"{chr(ord('A') + i)}:"
+        handle = kernel32.CreateFileW(
+            f"\\\\.\\{letter}", 0, FILE_SHARE_READ | FILE_SHARE_WRITE,
+            None, OPEN_EXISTING, 0, None
+        )
+        if handle == INVALID_HANDLE_VALUE:
+            continue
+        try:
+            extents = VOLUME_DISK_EXTENTS()
+            if device_io_control(handle, IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS, None, extents):
+                for j in range(min(extents.NumberOfDiskExtents, len(extents.Extents))):
+                    disk_letters = letters_by_disk.setdefault(extents.Extents[j].DiskNumber, [])
+                    if letter not in disk_letters:
+                        disk_letters.append(letter)
+        finally:
+            kernel32.CloseHandle(handle)
+    return letters_by_disk
+
 # -------------------------
 # Drive unmounting utilities
 # -------------------------
-def unmount_drive_letters(drive_letters):
+def unmount_drive_letters(drive_letters, lock_attempts=6):
     """
     Unmount/dismount the specified drive letters before wiping.
     Returns list of successfully unmounted drives.
@@ -251,37 +849,44 @@ def unmount_drive_letters(drive_letters):
             # Open handle to the volume
             handle = kernel32.CreateFileW(
                 volume_path,
-                0x40000000 | 0x80000000,  # GENERIC_READ | GENERIC_WRITE
-                0x00000001 | 0x00000002,  # FILE_SHARE_READ | FILE_SHARE_WRITE
+                GENERIC_READ | GENERIC_WRITE,
+                FILE_SHARE_READ | FILE_SHARE_WRITE,
                 None,
-                3,  # OPEN_EXISTING
+                OPEN_EXISTING,
                 0,
                 None
             )
             
-            if handle == -1:  # INVALID_HANDLE_VALUE
+            if handle == INVALID_HANDLE_VALUE:
                 print(f"Could not open handle to {drive_letter}")
                 continue
                 
             try:
-                # Lock the volume (FSCTL_LOCK_VOLUME)
+                # Lock the volume, retrying with exponential
+                # backoff while other handles are still being released
                 bytes_returned = wintypes.DWORD()
-                lock_result = kernel32.DeviceIoControl(
-                    handle,
-                    0x00090018,  # FSCTL_LOCK_VOLUME
-                    None, 0,
-                    None, 0,
-                    ctypes.byref(bytes_returned),
-                    None
-                )
-                
+                delay = BACKOFF_INITIAL_DELAY
+                for attempt in range(lock_attempts):
+                    lock_result = kernel32.DeviceIoControl(
+                        handle,
+                        FSCTL_LOCK_VOLUME,
+                        None, 0,
+                        None, 0,
+                        ctypes.byref(bytes_returned),
+                        None
+                    )
+                    if lock_result or attempt == lock_attempts - 1:
+                        break
+                    time.sleep(delay)
+                    delay = min(delay * 2, BACKOFF_MAX_DELAY)
+
                 if lock_result:
                     print(f"Successfully locked volume {drive_letter}")
                     
-                    # Dismount the volume (FSCTL_DISMOUNT_VOLUME)
+                    # Dismount the volume
                     dismount_result = kernel32.DeviceIoControl(
                         handle,
-                        0x00090020,  # FSCTL_DISMOUNT_VOLUME
+                        FSCTL_DISMOUNT_VOLUME,
                         None, 0,
                         None, 0,
                         ctypes.byref(bytes_returned),
@@ -304,103 +909,306 @@ def unmount_drive_letters(drive_letters):
             
     return unmounted
 
+def snapshot_system_handles():
+    """
+    Return every open handle in the system as an array of
+    SYSTEM_HANDLE_TABLE_ENTRY_INFO_EX, from a single NtQuerySystemInformation call.
+    """
+    ntdll = ctypes.windll.ntdll
+    size = 1 << 20
+    while True:
+        buf = ctypes.create_string_buffer(size)
+        needed = wintypes.ULONG()
+        status = ntdll.NtQuerySystemInformation(
+            SystemExtendedHandleInformation, buf, size, ctypes.byref(needed)
+        ) & 0xFFFFFFFF
+        if status == STATUS_INFO_LENGTH_MISMATCH:
+            # The table grows between calls; leave some headroom
+            size = max(size * 2, needed.value + (1 << 16))
+            continue
+        if status != 0:
+            raise OSError(f"NtQuerySystemInformation failed (0x{status:08X})")
+        break
+    header = SYSTEM_HANDLE_INFORMATION_EX.from_buffer(buf)
+    entry_array = SYSTEM_HANDLE_TABLE_ENTRY_INFO_EX * header.NumberOfHandles
+    return entry_array.from_buffer(buf, ctypes.sizeof(header))
+
+def list_open_files(drive_letters):
+    """
+    Find open file handles on the given drive letters (e.g. ["D:"]) across all
+    processes. Returns list of (pid, drive_letter, path) tuples.
+    """
+    kernel32 = ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.DuplicateHandle.argtypes = [
+        wintypes.HANDLE, wintypes.HANDLE, wintypes.HANDLE, ctypes.POINTER(wintypes.HANDLE),
+        wintypes.DWORD, wintypes.BOOL, wintypes.DWORD
+    ]
+    own_pid = kernel32.GetCurrentProcessId()
+    own_process = kernel32.GetCurrentProcess()
+
+    # Keep a file of our own open across the snapshot to learn the File object type index
+    probe = kernel32.CreateFileW(
+        sys.executable, GENERIC_READ, FILE_SHARE_READ | FILE_SHARE_WRITE,
+        None, OPEN_EXISTING, 0, None
+    )
+    if probe == INVALID_HANDLE_VALUE:
+        raise OSError(f"Failed to open probe file (Error {kernel32.GetLastError()})")
+    try:
+        handles = snapshot_system_handles()
+        file_type = next(
+            (h.ObjectTypeIndex for h in handles
+             if h.UniqueProcessId == own_pid and h.HandleValue == probe),
+            None
+        )
+    finally:
+        kernel32.CloseHandle(probe)
+    if file_type is None:
+        raise OSError("Could not determine file object type")
+
+    prefixes = [dl.upper() for dl in drive_letters]
+    processes = {}
+    found = []
+    path_buf = ctypes.create_unicode_buffer(1024)
+    try:
+        for h in handles:
+            if h.ObjectTypeIndex != file_type or h.UniqueProcessId == own_pid:
+                continue
+            pid = h.UniqueProcessId
+            if pid not in processes:
+                processes[pid] = kernel32.OpenProcess(PROCESS_DUP_HANDLE, False, pid)
+            process = processes[pid]
+            if not process:
+                continue
+            dup = wintypes.HANDLE()
+            if not kernel32.DuplicateHandle(process, h.HandleValue, own_process, ctypes.byref(dup),
+                                            0, False, DUPLICATE_SAME_ACCESS):
+                continue
+            try:
+                # Only regular files; querying the name of a pipe handle can block
+                if kernel32.GetFileType(dup) != FILE_TYPE_DISK:
+                    continue
+                length = kernel32.GetFinalPathNameByHandleW(dup, path_buf, len(path_buf), 0)
+                if not length or length >= len(path_buf):
+                    continue
+                path = path_buf.value
+                if path.startswith("\\\\?\\"):
+                    path = path[4:]
+                for prefix in prefixes:
+                    if path.upper().startswith(prefix):
+                        found.append((pid, prefix, path))
+                        break
+            finally:
+                kernel32.CloseHandle(dup)
+    finally:
+        for process in processes.values():
+            if process:
+                kernel32.CloseHandle(process)
+    return found
+
 def check_drive_usage(drive_letters):
     """
     Check if any processes are using the specified drives.
     Returns list of processes using the drives.
     """
     using_processes = []
-    
+    drive_letters = [dl if dl.endswith(':') else dl + ':' for dl in drive_letters]
+
+    # An exclusive open of the volume only fails with a sharing violation if
+    # something has it open; idle volumes need no process scan at all
+    kernel32 = ctypes.windll.kernel32
+    busy_letters = []
     for drive_letter in drive_letters:
-        if not drive_letter.endswith(':'):
-            drive_letter += ':'
-            
-        try:
-            # Get all processes
-            for proc in psutil.process_iter(['pid', 'name', 'open_files']):
-                try:
-                    open_files = proc.info['open_files']
-                    if open_files:
-                        for file_info in open_files:
-                            if file_info.path.upper().startswith(drive_letter.upper()):
-                                using_processes.append({
-                                    'pid': proc.info['pid'],
-                                    'name': proc.info['name'],
-                                    'drive': drive_letter,
-                                    'file': file_info.path
-                                })
-                                break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-        except Exception as e:
-            print(f"Error checking drive usage for {drive_letter}: {e}")
+        handle = kernel32.CreateFileW(
+            f"\\\\.\\{drive_letter}", GENERIC_READ | GENERIC_WRITE, 0,
+            None, OPEN_EXISTING, 0, None
+        )
+        if handle != INVALID_HANDLE_VALUE:
+            kernel32.CloseHandle(handle)
+        else:
+            # Sharing violation means it is in use; any other error (e.g. access
+            # denied) means we could not tell, so scan it to be safe
+            busy_letters.append(drive_letter)
+    drive_letters = busy_letters
+    if not drive_letters:
+        return using_processes
+
+    # One snapshot of the system handle table instead of walking every
+    # process's open files through psutil
+    try:
+        seen = set()
+        for pid, drive_letter, path in list_open_files(drive_letters):
+            if (pid, drive_letter) in seen:
+                continue
+            seen.add((pid, drive_letter))
+            try:
+                name = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                name = ""
+            using_processes.append({
+                'pid': pid,
+                'name': name,
+                'drive': drive_letter,
+                'file': path
+            })
+        return using_processes
+    except Exception as e:
+        print(f"Handle snapshot failed, falling back to per-process scan: {e}")
+    
+    # Walk the processes once and test every open file against all target drives
+    prefixes = tuple(dl.upper() for dl in drive_letters)
+    try:
+        # open_files is only fetched for processes that can hold files: the
+        # System Idle Process (0) and System (4) are skipped
+        for proc in psutil.process_iter(['pid', 'name']):
+            if proc.info['pid'] in (0, 4):
+                continue
+            try:
+                drives_seen = set()
+                for file_info in proc.open_files():
+                    path = file_info.path.upper()
+                    if not path.startswith(prefixes):
+                        continue
+                    drive_letter = path[:2]
+                    if drive_letter in drives_seen:
+                        continue
+                    drives_seen.add(drive_letter)
+                    using_processes.append({
+                        'pid': proc.info['pid'],
+                        'name': proc.info['name'],
+                        'drive': drive_letter,
+                        'file': file_info.path
+                    })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    except Exception as e:
+        print(f"Error checking drive usage for {', '.join(drive_letters)}: {e}")
     
     return using_processes
 
 def force_dismount_physical_drive(physical_device_path):
     """
-    Force dismount all volumes on a physical drive using diskpart.
-    This is a more aggressive approach when API calls fail.
+    Force dismount every volume on a physical drive, including volumes
+    without a drive letter. The volume is locked if possible, but dismounted
+    either way. This is a more aggressive approach when API calls fail.
     """
     try:
-        # Extract drive number from path like \\.\PhysicalDrive0
-        if "PhysicalDrive" in physical_device_path:
-            drive_num = physical_device_path.split("PhysicalDrive")[-1]
-            
-            # Create diskpart script - just dismount, don't clean
-            script_content = f"""select disk {drive_num}
-detail disk
-"""
-            
-            # Write temporary script file
-            script_path = "temp_dismount.txt"
-            with open(script_path, "w") as f:
-                f.write(script_content)
-            
-            # Run diskpart with the script
-            result = subprocess.run(
-                ["diskpart", "/s", script_path],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            # Clean up script file
-            try:
-                os.remove(script_path)
-            except:
-                pass
-                
-            if result.returncode == 0:
-                print(f"Successfully accessed physical drive {drive_num} via diskpart")
-                return True
-            else:
-                print(f"Diskpart failed: {result.stderr}")
-                return False
-                
+        _, drive_num = parse_physical_device(physical_device_path)
+    except ValueError:
+        return False
+    try:
+        kernel32 = ctypes.windll.kernel32
+
+        name = ctypes.create_unicode_buffer(260)
+        find = kernel32.FindFirstVolumeW(name, len(name))
+        if not find or find == INVALID_HANDLE_VALUE:
+            return False
+
+        dismounted = 0
+        try:
+            while True:
+                # \\?\Volume{GUID}\ -> \\?\Volume{GUID} (no trailing slash opens the volume)
+                volume_path = name.value.rstrip("\\")
+                handle = kernel32.CreateFileW(
+                    volume_path,
+                    GENERIC_READ | GENERIC_WRITE,
+                    FILE_SHARE_READ | FILE_SHARE_WRITE,
+                    None,
+                    OPEN_EXISTING,
+                    0,
+                    None
+                )
+                if handle != INVALID_HANDLE_VALUE:
+                    try:
+                        extents = VOLUME_DISK_EXTENTS()
+                        on_drive = device_io_control(handle, IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS, None, extents) and any(
+                            extents.Extents[i].DiskNumber == drive_num
+                            for i in range(min(extents.NumberOfDiskExtents, len(extents.Extents)))
+                        )
+                        if on_drive:
+                            bytes_returned = wintypes.DWORD()
+                            kernel32.DeviceIoControl(handle, FSCTL_LOCK_VOLUME, None, 0, None, 0,
+                                                     ctypes.byref(bytes_returned), None)
+                            if kernel32.DeviceIoControl(handle, FSCTL_DISMOUNT_VOLUME, None, 0, None, 0,
+                                                        ctypes.byref(bytes_returned), None):
+                                print(f"Force dismounted {volume_path}")
+                                dismounted += 1
+                    finally:
+                        kernel32.CloseHandle(handle)
+                if not kernel32.FindNextVolumeW(find, name, len(name)):
+                    break
+        finally:
+            kernel32.FindVolumeClose(find)
+
+        return dismounted > 0
+
     except Exception as e:
         print(f"Error in force dismount: {e}")
         return False
-    
-    return False
 
 # -------------------------
 # Worker thread for wiping
 # -------------------------
-class WipeWorker(QThread):
+class WipeWorker(QObject):
+    """
+    Long-lived wipe worker. Moved to its own QThread once and fed jobs through
+    start_job, so the thread and the aligned wipe buffers are reused across jobs.
+    """
+    start_job = pyqtSignal(str, dict, bool)  # job_id, disk, real_mode
     progress = pyqtSignal(int)
     finished = pyqtSignal(dict)  # report dict on finish
     log = pyqtSignal(str)
 
-    def __init__(self, job_id, disk, real_mode=False, chunk_mb=4):
+    def __init__(self, chunk_mb=16):
         super().__init__()
+        self.job_id = None
+        self.disk = None
+        self.real_mode = False
+        self.chunk_mb = chunk_mb
+        self.check_processes = False  # scan open handles on the target before wiping
+        self.sanitizing = False  # firmware sanitize running; it cannot be cancelled
+        self.idle = threading.Event()  # clear while a job is running
+        self.idle.set()
+        self._stop_requested = False
+        self._buffers = []
+        self.start_job.connect(self.run_job)
+
+    def stop(self):
+        """Request the wipe to stop before the next chunk is written."""
+        self._stop_requested = True
+
+    def get_buffers(self, chunk, count):
+        """
+        Return count page-aligned buffers of chunk bytes, reusing the ones
+        from the previous job when the size matches.
+        """
+        if self._buffers and (len(self._buffers) != count or len(self._buffers[0]) != chunk):
+            self.release_buffers()
+        if not self._buffers:
+            self._buffers = [alloc_aligned(chunk) for _ in range(count)]
+        return self._buffers
+
+    def release_buffers(self):
+        for buf in self._buffers:
+            free_aligned(buf)
+        self._buffers = []
+
+    @pyqtSlot(str, dict, bool)
+    def run_job(self, job_id, disk, real_mode):
+        self.idle.clear()
+        try:
+            self.process_job(job_id, disk, real_mode)
+        finally:
+            self.idle.set()
+
+    def process_job(self, job_id, disk, real_mode):
         self.job_id = job_id
         self.disk = disk
         self.real_mode = real_mode
-        self.chunk_mb = chunk_mb
+        self._stop_requested = False
 
-    def run(self):
-        start_ts = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+        start_ts = utc_timestamp()
         report = {
             "project": "NullNova",
             "job_id": self.job_id,
@@ -408,7 +1216,8 @@ class WipeWorker(QThread):
             "start_time_utc": start_ts,
             "method": "simulate" if not self.real_mode else f"single-pass-random-{self.chunk_mb}MB",
             "status": "started",
-            "progress_percent": 0
+            "progress_percent": 0,
+            "written_bytes": 0
         }
 
         try:
@@ -417,11 +1226,13 @@ class WipeWorker(QThread):
                 self.log.emit("SIMULATE: starting simulated wipe (no destructive I/O).")
                 steps = 20
                 for i in range(steps):
+                    if self._stop_requested:
+                        raise RuntimeError("Wipe cancelled by user")
                     time.sleep(0.2)
-                    pct = int(((i + 1) / steps) * 100)
+                    pct = (i + 1) * 100 // steps
                     self.progress.emit(pct)
                 report["status"] = "completed"
-                report["end_time_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+                report["end_time_utc"] = utc_timestamp()
                 self.finished.emit(report)
                 return
 
@@ -431,27 +1242,11 @@ class WipeWorker(QThread):
             if not raw_path:
                 raise RuntimeError("No physical device path available for this disk.")
 
-            # Additional normalization and validation
             self.log.emit(f"Original device path: {raw_path}")
-            
-            # Ensure proper format
-            if not raw_path.startswith("\\\\.\\"):
-                raw_path = "\\\\.\\" + raw_path.lstrip("\\")
-            
-            # Validate the device path format (case insensitive)
-            raw_path_upper = raw_path.upper()
-            if not raw_path_upper.startswith("\\\\.\\PHYSICALDRIVE"):
-                # Try to fix common variations
-                if "PHYSICALDRIVE" in raw_path_upper:
-                    # Extract drive number
-                    parts = raw_path_upper.split("PHYSICALDRIVE")
-                    if len(parts) == 2 and parts[1].isdigit():
-                        raw_path = f"\\\\.\\PhysicalDrive{parts[1]}"
-                        self.log.emit(f"Corrected device path to: {raw_path}")
-                    else:
-                        raise RuntimeError(f"Invalid device path format: {raw_path}")
-                else:
-                    raise RuntimeError(f"Invalid device path format (missing PhysicalDrive): {raw_path}")
+            try:
+                raw_path, _ = parse_physical_device(raw_path)
+            except ValueError as e:
+                raise RuntimeError(str(e))
             
             self.log.emit(f"Using device path: {raw_path}")
 
@@ -461,16 +1256,26 @@ class WipeWorker(QThread):
             
             self.log.emit(f"Target device size: {total:,} bytes ({total // (1024**3)} GB)")
             
-            # Check if the device exists before attempting to open
-            if not os.path.exists(raw_path):
-                raise RuntimeError(f"Device path does not exist: {raw_path}")
+            # Check the device exists before unmounting anything. A query-only
+            # open (no access rights) sends no I/O to the disk, unlike os.path.exists
+            kernel32 = ctypes.windll.kernel32
+            probe = kernel32.CreateFileW(raw_path, 0, FILE_SHARE_READ | FILE_SHARE_WRITE,
+                                         None, OPEN_EXISTING, 0, None)
+            if probe == INVALID_HANDLE_VALUE:
+                if kernel32.GetLastError() == ERROR_FILE_NOT_FOUND:
+                    raise RuntimeError(f"Device path does not exist: {raw_path}")
+            else:
+                kernel32.CloseHandle(probe)
 
             # UNMOUNT DRIVES BEFORE WIPING
             drive_letters = self.disk.get("drive_letters", [])
             if drive_letters:
-                # Check what processes are using the drives
-                self.log.emit("Checking for processes using the target drives...")
-                using_processes = check_drive_usage(drive_letters)
+                # Optionally report what processes are using the drives; it only
+                # informs the log, so it is skipped unless requested
+                using_processes = []
+                if self.check_processes:
+                    self.log.emit("Checking for processes using the target drives...")
+                    using_processes = check_drive_usage(drive_letters)
                 if using_processes:
                     self.log.emit(f"Warning: Found {len(using_processes)} processes using the drives:")
                     for proc in using_processes[:5]:  # Show first 5
@@ -487,93 +1292,158 @@ class WipeWorker(QThread):
                 else:
                     self.log.emit("Warning: Could not unmount drives using API method")
                     # Try force dismount as fallback
-                    self.log.emit("Attempting force dismount using diskpart...")
+                    self.log.emit("Attempting force dismount of all volumes on the disk...")
                     if force_dismount_physical_drive(raw_path):
                         self.log.emit("Force dismount successful")
                         report["force_dismounted"] = True
                     else:
                         self.log.emit("Warning: Force dismount also failed - proceeding anyway")
             
-            # Give system time to release handles after unmounting
-            self.log.emit("Waiting 2 seconds for system to release handles...")
-            time.sleep(2)
-            
-            # Test device access before proceeding
-            self.log.emit("Testing device access...")
-            access_ok, access_msg = test_device_access(raw_path)
-            if not access_ok:
-                raise RuntimeError(f"Device access test failed: {access_msg}")
-            self.log.emit(f"Device access test: {access_msg}")
-            
+            # Open the device once, backing off while the system releases
+            # handles after unmounting; the same handle is used for the wipe
             self.log.emit(f"REAL: preparing to wipe raw device {raw_path} (requires admin)...")
-
-            # Ensure chunk size is aligned to sector boundary (512 bytes)
-            sector_size = 512
-            chunk = ((self.chunk_mb * 1024 * 1024) // sector_size) * sector_size
-            if chunk == 0:
-                chunk = sector_size
                 
             written = 0
             handle = None
             
-            # Attempt to open raw device using Windows API
             self.log.emit(f"Opening device handle for {raw_path}...")
-            handle, error_msg = open_physical_drive_handle(raw_path)
+            handle, error_msg = wait_for_device_access(raw_path)
             if handle is None:
-                raise RuntimeError(error_msg)
+                raise RuntimeError(f"Device access failed: {error_msg}")
             
             self.log.emit(f"Successfully opened device handle for {raw_path}")
 
+            # Everything that uses the exclusive handle runs inside this try,
+            # so the drive is never left locked if a step raises
+            writer = None
+            prefetch = None
             try:
+                # Flash media: overwriting goes through the FTL and can leave stale
+                # cells behind, so prefer a firmware sanitize when the drive has one
+                if self.disk.get("media_type") == "SSD":
+                    self.log.emit("SSD detected: requesting firmware sanitize...")
+                    self.sanitizing = True
+                    try:
+                        sanitized, sanitize_error = reinitialize_media(handle)
+                    finally:
+                        self.sanitizing = False
+                    if sanitized:
+                        self.log.emit("Firmware sanitize completed")
+                        self.progress.emit(100)
+                        report["method"] = "firmware-sanitize (IOCTL_STORAGE_REINITIALIZE_MEDIA)"
+                        # Same report shape as an overwrite; the drive erased itself
+                        report["written_bytes"] = 0
+                        report["note"] = "Media erased by drive firmware; no overwrite data was written"
+                        report["status"] = "completed"
+                        report["end_time_utc"] = utc_timestamp()
+                        self.finished.emit(report)
+                        return
+                    self.log.emit(f"{sanitize_error} - falling back to overwrite")
+
+                # The size from the disk scan may be stale; the open handle is authoritative
+                exact_total = query_disk_length(handle)
+                if exact_total and exact_total != total:
+                    self.log.emit(f"Device reports {exact_total:,} bytes (scan said {total:,}); using device size")
+                    total = exact_total
+
+                # Align chunks to the physical sector so every write covers whole
+                # physical sectors; the tail only needs logical-sector alignment
+                sector_size, physical_sector = query_sector_sizes(handle)
+                chunk = self.chunk_mb * 1024 * 1024
+                chunk = max(physical_sector, ((chunk + physical_sector - 1) // physical_sector) * physical_sector)
+                self.log.emit(f"Sector size: {sector_size} logical / {physical_sector} physical, "
+                              f"chunk {chunk:,} bytes")
+                report["sector_size"] = {"logical": sector_size, "physical": physical_sector}
+                # chunk is already aligned, so only the final partial write needs
+                # rounding up to a whole logical sector
+                tail_size = ((total % chunk + sector_size - 1) // sector_size) * sector_size
+
+                # Up to WIPE_QUEUE_DEPTH buffers are in flight while the producer
+                # thread generates the next chunk into a spare one
+                writer = OverlappedWriter(handle)
+                stream = RandomStream(chunk)
+                buffers = self.get_buffers(chunk, writer.depth + 1)
+                prefetch = PrefetchedBuffers(stream, buffers, (total + chunk - 1) // chunk)
+                self.log.emit("Wipe data source: " + ("AES-256-CTR keystream" if AES else "BCryptGenRandom"))
+                self.log.emit(f"Overlapped writes in flight: {writer.depth}")
+
                 # Overwrite entire device with random bytes in chunks
-                import os as _os
+                last_pct = -1
+                last_emit = 0.0
+                last_logged = 0
+                submitted = 0
                 while written < total:
-                    remaining = total - written
-                    to_write = min(chunk, remaining)
-                    
-                    # Ensure write size is sector-aligned
-                    to_write = ((to_write + sector_size - 1) // sector_size) * sector_size
-                    if written + to_write > total:
-                        to_write = ((remaining + sector_size - 1) // sector_size) * sector_size
-                    
-                    # Generate cryptographically secure random bytes
+                    if self._stop_requested:
+                        raise RuntimeError(f"Wipe cancelled by user at offset {written}")
                     try:
-                        data = _os.urandom(to_write)
+                        # Keep the device queue full
+                        while submitted < total and writer.pending < writer.depth:
+                            # Every write is a whole chunk except the tail
+                            to_write = chunk if total - submitted >= chunk else tail_size
+                            
+                            # Take the next pre-generated random buffer
+                            slot = prefetch.get()
+                            writer.submit(prefetch.buffers[slot], to_write, submitted, (slot, to_write))
+                            submitted += to_write
                         
-                        # Write using Windows API
-                        bytes_written, write_error = write_to_physical_drive(handle, data)
-                        if write_error:
-                            raise RuntimeError(f"Write operation failed: {write_error}")
+                        # Recycle the oldest buffer once its write completes
+                        bytes_written, (slot, to_write) = writer.wait_oldest()
+                        prefetch.release(slot)
                         
                         if bytes_written != to_write:
                             raise RuntimeError(f"Write operation incomplete: expected {to_write}, wrote {bytes_written}")
                         
                         written += bytes_written
-                        pct = int((written / total) * 100)
-                        self.progress.emit(min(pct, 100))
+                        # Only signal the GUI when the percentage actually moves,
+                        # and no more often than PROGRESS_EMIT_INTERVAL
+                        pct = min(written * 100 // total, 100)
+                        if pct != last_pct:
+                            now = time.monotonic()
+                            if now - last_emit >= PROGRESS_EMIT_INTERVAL:
+                                self.progress.emit(pct)
+                                last_pct = pct
+                                last_emit = now
                         
-                        # Log progress every 100MB
-                        if written % (100 * 1024 * 1024) == 0:
+                        # Log progress every 10%
+                        if pct // 10 != last_logged // 10:
                             self.log.emit(f"Written: {written:,} bytes ({pct}%)")
+                            last_logged = pct
                             
                     except Exception as e:
                         raise RuntimeError(f"Write operation failed at offset {written}: {e}")
                 
+                if last_pct != 100:
+                    self.progress.emit(100)
                 self.log.emit(f"Successfully wrote {written:,} bytes to device")
+
+                # One flush at the end so the drive's own write cache is committed
+                if not _kernel32.FlushFileBuffers(handle):
+                    self.log.emit(f"Warning: FlushFileBuffers failed (Error {_kernel32.GetLastError()})")
+
+                # Flash media without firmware sanitize: the overwrite went through
+                # the FTL, so also deallocate everything to let the drive erase
+                # the remapped cells it still holds
+                if self.disk.get("media_type") == "SSD":
+                    trimmed, trim_error = trim_device(handle)
+                    report["trimmed"] = trimmed
+                    self.log.emit("TRIM of whole device completed" if trimmed else f"Warning: {trim_error}")
                     
             finally:
-                if handle:
-                    close_physical_drive_handle(handle)
-                    self.log.emit("Device handle closed successfully")
+                if writer is not None:
+                    writer.close()
+                if prefetch is not None:
+                    prefetch.close()
+                close_physical_drive_handle(handle)
+                self.log.emit("Device handle closed successfully")
 
             report["status"] = "completed"
-            report["end_time_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+            report["end_time_utc"] = utc_timestamp()
             report["written_bytes"] = written
             self.finished.emit(report)
         except Exception as ex:
-            report["status"] = "failed"
+            report["status"] = "cancelled" if self._stop_requested else "failed"
             report["error"] = str(ex)
-            report["end_time_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+            report["end_time_utc"] = utc_timestamp()
             self.log.emit("ERROR: " + str(ex))
             self.finished.emit(report)
 
@@ -581,6 +1451,16 @@ class WipeWorker(QThread):
 # -------------------------
 # Main GUI
 # -------------------------
+class DiskScanThread(QThread):
+    finished = pyqtSignal(list)  # disk dicts from enumerate_windows_disks
+
+    def __init__(self, force=False):
+        super().__init__()
+        self.force = force
+
+    def run(self):
+        self.finished.emit(enumerate_windows_disks(force=self.force))
+
 class NullNovaApp(QWidget):
     def __init__(self):
         super().__init__()
@@ -601,11 +1481,11 @@ class NullNovaApp(QWidget):
 
         btn_layout = QHBoxLayout()
         self.btn_refresh = QPushButton("Refresh Drives")
-        self.btn_refresh.clicked.connect(self.load_drives)
+        self.btn_refresh.clicked.connect(lambda: self.load_drives())
         btn_layout.addWidget(self.btn_refresh)
 
         self.btn_scan = QPushButton("Rescan")
-        self.btn_scan.clicked.connect(self.load_drives)
+        self.btn_scan.clicked.connect(self.force_rescan)
         btn_layout.addWidget(self.btn_scan)
 
         layout.addLayout(btn_layout)
@@ -619,6 +1499,9 @@ class NullNovaApp(QWidget):
         mode_layout.addWidget(self.rb_real)
         layout.addLayout(mode_layout)
 
+        self.chk_scan_handles = QCheckBox("Scan open handles before wipe (slow)")
+        layout.addWidget(self.chk_scan_handles)
+
         # Safety confirmation and input
         conf_layout = QHBoxLayout()
         self.chk_confirm = QCheckBox("I understand this is destructive when Real mode is selected")
@@ -634,6 +1517,11 @@ class NullNovaApp(QWidget):
         self.btn_wipe.clicked.connect(self.start_wipe)
         action_layout.addWidget(self.btn_wipe)
 
+        self.btn_cancel = QPushButton("Cancel Wipe")
+        self.btn_cancel.clicked.connect(self.cancel_wipe)
+        self.btn_cancel.setEnabled(False)
+        action_layout.addWidget(self.btn_cancel)
+
         self.btn_save_report = QPushButton("Save Last Report JSON")
         self.btn_save_report.clicked.connect(self.save_last_report)
         self.btn_save_report.setEnabled(False)
@@ -654,18 +1542,73 @@ class NullNovaApp(QWidget):
         self.log_list = QListWidget()
         layout.addWidget(self.log_list)
 
+        # Log lines are batched so bursts cost one list update instead of one each
+        self._pending_logs = []
+        self.log_timer = QTimer(self)
+        self.log_timer.setSingleShot(True)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_timer.timeout.connect(self.flush_logs)
+
         self.setLayout(layout)
 
         self.last_report = None
+        self.last_report_json = None
+        self.scan_thread = None
+        self.disks = []
+
+        # One wipe thread for the lifetime of the window; jobs are queued to it
+        self.wipe_thread = QThread()
+        self.worker = WipeWorker(chunk_mb=16)
+        self.worker.moveToThread(self.wipe_thread)
+        self.worker.progress.connect(self.progress.setValue)
+        self.worker.log.connect(self.log)
+        self.worker.finished.connect(self.on_finished)
+        self.wipe_thread.start()
+
         self.load_drives()
 
-    def load_drives(self):
-        self.drive_list.clear()
+    def closeEvent(self, event):
+        # A firmware sanitize cannot be stopped and may run for up to
+        # SANITIZE_TIMEOUT_SECONDS, so keep the window open until it ends
+        if self.worker.sanitizing:
+            QMessageBox.warning(self, "Sanitize In Progress",
+                                "The drive is running a firmware sanitize. Close NullNova after it finishes.")
+            event.ignore()
+            return
+        # Cancel the job, and stop the thread's event loop only once the worker
+        # is idle; otherwise the window stays open with the thread still usable
+        self.worker.stop()
+        if not self.worker.idle.wait(CLOSE_WAIT_MS / 1000):
+            self.log("Waiting for the wipe to stop; close the window again in a moment")
+            event.ignore()
+            return
+        self.wipe_thread.quit()
+        self.wipe_thread.wait()
+        self.worker.release_buffers()
+        super().closeEvent(event)
+
+    def load_drives(self, force=False):
+        # Enumerate in the background so the window stays responsive
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        self.btn_refresh.setEnabled(False)
+        self.btn_scan.setEnabled(False)
         self.log("Scanning attached disks...")
-        disks = enumerate_windows_disks()
+        self.scan_thread = DiskScanThread(force=force)
+        self.scan_thread.finished.connect(self.populate_drives)
+        self.scan_thread.start()
+
+    def force_rescan(self):
+        self.load_drives(force=True)
+
+    def populate_drives(self, disks):
+        self.btn_refresh.setEnabled(True)
+        self.btn_scan.setEnabled(True)
+        self.drive_list.clear()
+        self.disks = disks
         if not disks:
-            self.log("No disks found or WMI failed.")
-        for d in disks:
+            self.log("No disks found or disk enumeration failed.")
+        for i, d in enumerate(disks):
             letters = ",".join(d.get("drive_letters", [])) or "(no letter)"
             size_gb = int(d.get("size_bytes", 0) / (1024 ** 3))
             sys_tag = "SYSTEM" if d.get("is_system") else ""
@@ -676,14 +1619,21 @@ class NullNovaApp(QWidget):
             
             item_text = f"{device_path} | {d.get('model')} | {size_gb} GB | {letters} {sys_tag}"
             self.drive_list.addItem(item_text)
-            # attach raw data via QListWidgetItem data hack
+            # attach the index into self.disks rather than the dict itself
             item = self.drive_list.item(self.drive_list.count() - 1)
-            item.setData(Qt.UserRole, d)
+            item.setData(Qt.UserRole, i)
 
     def log(self, text: str):
-        ts = datetime.datetime.utcnow().strftime("%H:%M:%S")
-        self.log_list.addItem(f"[{ts}] {text}")
-        self.log_list.scrollToBottom()
+        ts = time.strftime("%H:%M:%S", time.gmtime())
+        self._pending_logs.append(f"[{ts}] {text}")
+        if not self.log_timer.isActive():
+            self.log_timer.start()
+
+    def flush_logs(self):
+        if self._pending_logs:
+            self.log_list.addItems(self._pending_logs)
+            self._pending_logs = []
+            self.log_list.scrollToBottom()
 
     def test_selected_device(self):
         """Test access to the selected device without actually wiping it."""
@@ -692,7 +1642,7 @@ class NullNovaApp(QWidget):
             QMessageBox.warning(self, "Select Disk", "Please select a disk to test.")
             return
         
-        disk = item.data(Qt.UserRole)
+        disk = self.disks[item.data(Qt.UserRole)]
         device_path = disk.get("physical_device")
         
         if not device_path:
@@ -723,7 +1673,7 @@ class NullNovaApp(QWidget):
         if not item:
             QMessageBox.warning(self, "Select Disk", "Please select a disk to wipe (use a test disk or VM).")
             return
-        disk = item.data(Qt.UserRole)
+        disk = self.disks[item.data(Qt.UserRole)]
 
         # block system disk
         if disk.get("is_system"):
@@ -768,15 +1718,20 @@ class NullNovaApp(QWidget):
         job_id = str(uuid.uuid4())
         self.log(f"Starting job {job_id} on {disk.get('physical_device')} (real={real})")
         self.progress.setValue(0)
-        self.worker = WipeWorker(job_id=job_id, disk=disk, real_mode=real, chunk_mb=4)
-        self.worker.progress.connect(self.progress.setValue)
-        self.worker.log.connect(self.log)
-        self.worker.finished.connect(self.on_finished)
         self.btn_wipe.setEnabled(False)
-        self.worker.start()
+        self.btn_cancel.setEnabled(True)
+        self.worker.check_processes = self.chk_scan_handles.isChecked()
+        self.worker.start_job.emit(job_id, disk, real)
+
+    def cancel_wipe(self):
+        if self.btn_cancel.isEnabled():
+            self.log("Cancelling wipe...")
+            self.btn_cancel.setEnabled(False)
+            self.worker.stop()
 
     def on_finished(self, report: dict):
         self.btn_wipe.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
         self.last_report = report
         status = report.get('status')
         self.log(f"Job {report.get('job_id')} finished with status: {status}")
@@ -807,10 +1762,10 @@ class NullNovaApp(QWidget):
             error_dialog.exec_()
         
         # compute a canonical hash for the session
-        canonical = json.dumps(report, sort_keys=True).encode("utf-8")
-        h = hashlib.sha256(canonical).hexdigest()
-        report["session_hash_sha256"] = h
+        report["session_hash_sha256"] = hash_report(report)
         self.last_report = report
+        # serialize the saved form once; save_last_report just writes these bytes
+        self.last_report_json = dumps_report(report, indent=True)
         self.btn_save_report.setEnabled(True)
         
         if status == "completed":
@@ -823,10 +1778,14 @@ class NullNovaApp(QWidget):
             QMessageBox.warning(self, "No report", "No report to save.")
             return
         filename = f"nullnova_report_{self.last_report.get('job_id')}.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(self.last_report, f, indent=2)
+        with open(filename, "wb") as f:
+            f.write(self.last_report_json)
+        # sha256sum-compatible sidecar over the exact bytes written
+        digest = hashlib.sha256(self.last_report_json).hexdigest()
+        with open(filename + ".sha256", "w", encoding="utf-8") as f:
+            f.write(f"{digest}  {filename}\n")
         QMessageBox.information(self, "Saved", f"Report saved to {filename}")
-        self.log(f"Report saved -> {filename}")
+        self.log(f"Report saved -> {filename} (sha256 {digest})")
 
 # -------------------------
 # Run app